@@ -1,5 +1,5 @@
 """Repository analyzer module for extracting deployment-relevant context."""
 
-from .repo_analyzer import RepoAnalyzer, RepoContext
+from .repo_analyzer import REPO_CONTEXT_TOKEN_BUDGET, RepoAnalyzer, RepoContext
 
-__all__ = ["RepoAnalyzer", "RepoContext"]
+__all__ = ["RepoAnalyzer", "RepoContext", "REPO_CONTEXT_TOKEN_BUDGET"]
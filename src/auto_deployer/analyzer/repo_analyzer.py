@@ -80,6 +80,9 @@ KEY_FILES = [
 # 文件大小限制（防止读取超大文件）
 MAX_FILE_SIZE = 50 * 1024  # 50KB
 
+# 仓库上下文在提示词中的 token 预算（规划和每个步骤的提示词都会包含它）
+REPO_CONTEXT_TOKEN_BUDGET = 8_000
+
 
 @dataclass
 class RepoContext:
@@ -105,49 +108,88 @@ class RepoContext:
     # 分析摘要
     summary: str = ""
     
-    def to_prompt_context(self) -> str:
-        """Convert to a string suitable for LLM prompt."""
-        sections = []
+    def to_prompt_context(self, max_tokens: Optional[int] = None) -> str:
+        """
+        Convert to a string suitable for LLM prompt.
+        
+        Args:
+            max_tokens: Optional token budget. When exceeded, key files are
+                dropped from least to most important (KEY_FILES order), then
+                the directory tree is cut short.
+        
+        Returns:
+            Formatted repository context
+        """
+        from ..llm.token_manager import estimate_tokens
         
         # 项目概述
-        sections.append(f"# Repository Analysis: {self.project_name}")
-        sections.append(f"- URL: {self.repo_url}")
-        sections.append(f"- Detected Type: {self.project_type or 'unknown'}")
+        header = [
+            f"# Repository Analysis: {self.project_name}",
+            f"- URL: {self.repo_url}",
+            f"- Detected Type: {self.project_type or 'unknown'}",
+        ]
         if self.detected_framework:
-            sections.append(f"- Framework: {self.detected_framework}")
-        sections.append("")
-        
-        # 目录结构
-        if self.directory_tree:
-            sections.append("## Directory Structure")
-            sections.append("```")
-            sections.append(self.directory_tree)
-            sections.append("```")
-            sections.append("")
+            header.append(f"- Framework: {self.detected_framework}")
+        header.append("")
+        header_text = "\n".join(header)
         
         # 脚本（如果是 Node.js 项目）
+        scripts_text = ""
         if self.detected_scripts:
-            sections.append("## Available Scripts (from package.json)")
+            lines = ["## Available Scripts (from package.json)"]
             for name, cmd in self.detected_scripts.items():
-                sections.append(f"- `npm run {name}`: {cmd}")
-            sections.append("")
+                lines.append(f"- `npm run {name}`: {cmd}")
+            lines.append("")
+            scripts_text = "\n".join(lines)
         
-        # 关键文件内容
-        if self.files:
-            sections.append("## Key Files")
-            for filename, content in self.files.items():
-                sections.append(f"### {filename}")
-                sections.append("```")
-                # 截断超长内容
-                if len(content) > 3000:
-                    sections.append(content[:3000])
-                    sections.append(f"... (truncated, {len(content)} chars total)")
-                else:
-                    sections.append(content)
-                sections.append("```")
-                sections.append("")
+        # 关键文件内容（files 按 KEY_FILES 的重要性顺序读取）
+        file_blocks = []
+        for filename, content in self.files.items():
+            # 截断超长内容
+            if len(content) > 3000:
+                content = f"{content[:3000]}\n... (truncated, {len(content)} chars total)"
+            file_blocks.append((filename, f"### {filename}\n```\n{content}\n```\n"))
+        
+        tree = self.directory_tree
+        omitted: List[str] = []
+        
+        def render() -> str:
+            sections = [header_text]
+            # 目录结构
+            if tree:
+                sections.append(f"## Directory Structure\n```\n{tree}\n```\n")
+            if scripts_text:
+                sections.append(scripts_text)
+            if file_blocks:
+                sections.append("## Key Files")
+                sections.extend(block for _, block in file_blocks)
+            if omitted:
+                sections.append(f"(Omitted to fit the prompt budget: {', '.join(omitted)})")
+            return "\n".join(sections)
+        
+        text = render()
+        if max_tokens is None or estimate_tokens(text) <= max_tokens:
+            return text
         
-        return "\n".join(sections)
+        # 超出预算：先丢弃最不重要的文件，再截断目录树
+        while file_blocks and estimate_tokens(text) > max_tokens:
+            omitted.insert(0, file_blocks.pop()[0])
+            text = render()
+        
+        if tree and estimate_tokens(text) > max_tokens:
+            marker = "... (truncated)"
+            excess_chars = (estimate_tokens(text) - max_tokens) * 4 + len(marker) + 1
+            tree_lines = tree.splitlines()
+            while tree_lines and excess_chars > 0:
+                excess_chars -= len(tree_lines.pop()) + 1
+            tree = "\n".join(tree_lines + [marker])
+            text = render()
+        
+        logger.info(
+            f"Repository context trimmed to ~{estimate_tokens(text):,} tokens "
+            f"(budget {max_tokens:,}, omitted {len(omitted)} files)"
+        )
+        return text
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
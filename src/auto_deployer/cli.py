@@ -10,7 +10,6 @@ from pathlib import Path
 from typing import Optional
 
 from .config import AppConfig, load_config
-from .workflow import DeploymentRequest, DeploymentWorkflow
 
 logger = logging.getLogger(__name__)
 
@@ -346,38 +345,25 @@ def handle_memory_command(args: argparse.Namespace, context: CLIContext) -> int:
         
         print(f"🔄 Refining {len(unprocessed)} experiences with LLM...")
         
-        # 创建简单的 LLM 包装器
+        # 适配 refiner 的 generate(prompt) 接口，复用已配置的 LLM provider
         class SimpleLLM:
             def __init__(self, config):
-                import requests
-                self.config = config
-                self.session = requests.Session()
-                self.endpoint = config.endpoint or (
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{config.model}:generateContent"
-                )
-                proxy = config.proxy
-                if proxy:
-                    self.session.proxies = {"http": proxy, "https": proxy}
+                from dataclasses import replace
+                from .llm.base import create_llm_provider
+                # 精炼固定使用 0.3 的温度，与配置中用于部署的温度无关
+                self.provider = create_llm_provider(replace(config, temperature=0.3))
             
             def generate(self, prompt: str) -> str:
-                url = f"{self.endpoint}?key={self.config.api_key}"
-                body = {
-                    "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-                    "generationConfig": {"temperature": 0.3},
-                }
-                resp = self.session.post(url, json=body, timeout=60)
-                resp.raise_for_status()
-                data = resp.json()
-                candidates = data.get("candidates") or []
-                for c in candidates:
-                    parts = c.get("content", {}).get("parts", [])
-                    for p in parts:
-                        if p.get("text"):
-                            return p["text"]
-                return ""
+                response = self.provider.generate_response(prompt, response_format="text")
+                if response is None:
+                    # refiner 记录错误并跳过该条经验，不会把空结果当作精炼结果
+                    raise RuntimeError("LLM call failed (see log above)")
+                return response
         
         llm = SimpleLLM(context.config.llm)
-        refiner = ExperienceRefiner(llm)
+        # 知识库已依赖 sentence-transformers，相似经验复用精炼结果
+        from .llm.cache import SemanticCache
+        refiner = ExperienceRefiner(llm, cache=SemanticCache(embedding_model=store.embedding_model))
         
         refined_count = 0
         for exp in unprocessed:
@@ -645,6 +631,9 @@ def dispatch_command(args: argparse.Namespace) -> int:
             context.config.interaction.mode = "auto"
             logger.info("CLI override: non-interactive mode enabled (auto-select defaults)")
     
+    # 延迟导入：logs/memory/--help 不需要加载 SSH 和 LLM 依赖
+    from .workflow import DeploymentRequest, DeploymentWorkflow
+
     workflow = DeploymentWorkflow(
         config=context.config,
         workspace=context.workspace,
@@ -63,6 +63,11 @@ class LLMConfig:
     endpoint: Optional[str] = None
     temperature: float = 0.0
     proxy: Optional[str] = None  # 代理设置，如 "http://127.0.0.1:7890"
+    requests_per_minute: Optional[int] = None  # 客户端限速，None 使用提供商默认值
+    max_concurrency: Optional[int] = None      # 最大并发请求数，None 使用默认值
+    api_keys: List[str] = field(default_factory=list)  # 额外的 API 密钥，与 api_key 轮询使用
+    compress_requests: bool = False  # 对较大的请求体使用 gzip（需端点支持 Content-Encoding: gzip）
+    warmup_connections: bool = False  # 创建会话时预先建立到 API 主机的连接（会发送一个 HEAD 请求）
 
 
 @dataclass
@@ -167,6 +172,7 @@ def load_config(path: Optional[str] = None) -> AppConfig:
     
     Environment variables (higher priority than config file):
     - AUTO_DEPLOYER_LLM_API_KEY or AUTO_DEPLOYER_GEMINI_API_KEY: LLM API key
+    - AUTO_DEPLOYER_LLM_API_KEYS: Additional comma-separated API keys (round-robin)
     - AUTO_DEPLOYER_LLM_PROXY: HTTP proxy for LLM requests
     - AUTO_DEPLOYER_SSH_HOST: Default SSH host
     - AUTO_DEPLOYER_SSH_PORT: Default SSH port
@@ -195,6 +201,11 @@ def load_config(path: Optional[str] = None) -> AppConfig:
                     "AUTO_DEPLOYER_LLM_API_KEY"
                 )
             
+            # 额外的 API 密钥（逗号分隔），用于突破单个密钥的 RPM 限制
+            env_api_keys = os.getenv("AUTO_DEPLOYER_LLM_API_KEYS")
+            if env_api_keys:
+                config.llm.api_keys = [k.strip() for k in env_api_keys.split(",") if k.strip()]
+            
             # Load proxy from environment variable
             env_proxy = os.getenv("AUTO_DEPLOYER_LLM_PROXY")
             if env_proxy:
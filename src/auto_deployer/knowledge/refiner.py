@@ -4,7 +4,10 @@ from __future__ import annotations
 
 import logging
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..llm.cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
@@ -52,12 +55,14 @@ REFINE_PROMPT = """你是一个部署经验分析专家。请分析以下从部
 class ExperienceRefiner:
     """使用 LLM 精炼原始经验"""
     
-    def __init__(self, llm_client=None):
+    def __init__(self, llm_client=None, cache: Optional["SemanticCache"] = None):
         """
         Args:
             llm_client: LLM 客户端，需要有 generate(prompt) 方法
+            cache: 可选的语义缓存，相似的失败记录复用已有的分析结果
         """
         self._llm = llm_client
+        self._cache = cache
     
     def set_llm(self, llm_client):
         """设置 LLM 客户端"""
@@ -84,13 +89,18 @@ class ExperienceRefiner:
         prompt = REFINE_PROMPT.format(raw_content=raw_content)
         
         try:
-            response = self._llm.generate(prompt)
+            # 仅 PID、时间戳、路径不同的记录属于同一类问题，直接复用分析结果
+            cached = self._cache.get("refine", raw_content) if self._cache else None
+            response = cached if cached is not None else self._llm.generate(prompt)
             result = self._parse_response(response)
             
             if not result:
                 logger.warning(f"Failed to parse LLM response for {raw_experience.get('id')}")
                 return None
             
+            if self._cache and cached is None:
+                self._cache.put("refine", raw_content, response)
+            
             # 构建精炼后的经验
             refined_content = self._build_refined_content(result, raw_experience)
             refined_metadata = self._build_refined_metadata(result, raw_experience)
@@ -1,15 +1,41 @@
-"""LLM provider package."""
-
-from .agent import DeploymentPlanner
-from .base import BaseLLMProvider, create_llm_provider
-from .gemini import GeminiProvider
-from .openai import OpenAIProvider
-from .anthropic import AnthropicProvider
-from .deepseek import DeepSeekProvider
-from .openrouter import OpenRouterProvider
-from .openai_compatible import OpenAICompatibleProvider
-from .token_manager import TokenManager
-from .history_compressor import HistoryCompressor
+"""LLM provider package.
+
+Exports are resolved lazily so that importing a single submodule (e.g.
+``auto_deployer.llm.base``) does not load every provider and their
+HTTP dependencies.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .agent import DeploymentPlanner
+    from .base import BaseLLMProvider, create_llm_provider
+    from .gemini import GeminiProvider
+    from .openai import OpenAIProvider
+    from .anthropic import AnthropicProvider
+    from .deepseek import DeepSeekProvider
+    from .openrouter import OpenRouterProvider
+    from .openai_compatible import OpenAICompatibleProvider
+    from .token_manager import TokenManager
+    from .history_compressor import HistoryCompressor
+
+# export name -> submodule
+_EXPORTS = {
+    "DeploymentPlanner": "agent",
+    "create_llm_provider": "base",
+    "BaseLLMProvider": "base",
+    "GeminiProvider": "gemini",
+    "OpenAIProvider": "openai",
+    "AnthropicProvider": "anthropic",
+    "DeepSeekProvider": "deepseek",
+    "OpenRouterProvider": "openrouter",
+    "OpenAICompatibleProvider": "openai_compatible",
+    "TokenManager": "token_manager",
+    "HistoryCompressor": "history_compressor",
+}
 
 __all__ = [
     # Planning
@@ -29,3 +55,12 @@ __all__ = [
     "TokenManager",
     "HistoryCompressor",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,241 @@
+"""Shared request path for OpenAI-style Chat Completions providers.
+
+OpenAI, DeepSeek, OpenRouter and OpenAI-compatible endpoints speak the same
+protocol, so request building, the retry loop, error handling and streaming
+live here once. Subclasses only set up ``__init__`` (URL, headers, body
+defaults, session, rate limiter, key pool and circuit breaker) and may
+override ``_system_content`` for provider-specific system prompt handling.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from types import MappingProxyType
+from typing import Any, Iterator, Optional
+
+import requests
+
+from ._http import encode_body, iter_sse_data, loads, log_error_response
+from .base import BaseLLMProvider, cached, coalesce_inflight
+from .key_pool import ApiKeySlot, KeyPool, key_fingerprint
+from .rate_limiter import get_rate_limiter, retry_delay
+
+logger = logging.getLogger(__name__)
+
+
+class ChatCompletionsProvider(BaseLLMProvider):
+    """Base class for providers using the OpenAI Chat Completions API."""
+
+    # Provider name used in log messages
+    display_name = "OpenAI-compatible"
+
+    def _build_key_pool(self, provider: str, config: Any) -> KeyPool:
+        """Pool the primary key with any additional ``config.api_keys``."""
+        slots = [ApiKeySlot(self._headers, self._rate_limiter)]
+        for api_key in getattr(config, "api_keys", None) or []:
+            headers = MappingProxyType({**self._headers, "Authorization": f"Bearer {api_key}"})
+            limiter = get_rate_limiter(
+                provider, config.requests_per_minute, config.max_concurrency, key_fingerprint(api_key)
+            )
+            slots.append(ApiKeySlot(headers, limiter))
+        return KeyPool(slots)
+
+    def _system_content(self, system_prompt: str) -> Any:
+        """Return the content of the system message."""
+        return system_prompt
+
+    def _build_body(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        response_format: str,
+    ) -> dict:
+        """Build a Chat Completions request body."""
+        # Build messages
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": self._system_content(system_prompt)})
+        messages.append({"role": "user", "content": prompt})
+
+        # Build request body
+        body = {
+            **self._body_base,
+            "messages": messages,
+        }
+
+        # Add response format if JSON is requested (not all endpoints support this)
+        if response_format == "json":
+            body["response_format"] = {"type": "json_object"}
+
+        return body
+
+    @cached
+    @coalesce_inflight
+    def generate_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+        max_retries: int = 3,
+    ) -> Optional[str]:
+        """
+        Generate a response from the Chat Completions endpoint.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+            max_retries: Maximum number of retries on rate limit
+
+        Returns:
+            Generated text or None on failure
+        """
+        body = self._build_body(prompt, system_prompt, response_format)
+
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("%s circuit open, skipping API call", self.display_name)
+            return None
+
+        payload, extra_headers = encode_body(body, self._compress_requests)
+
+        # Retry loop for rate limiting
+        for attempt in range(max_retries):
+            try:
+                key = self._key_pool.acquire()
+                with key.rate_limiter:
+                    response = self.session.post(
+                        self._url,
+                        data=payload,
+                        headers={**key.headers, **extra_headers} if extra_headers else key.headers,
+                        timeout=timeout
+                    )
+
+                # Handle rate limiting
+                status = response.status_code
+                if status == 429:
+                    self._breaker.record_failure()
+                    wait_time = retry_delay(response, attempt)
+                    if self._key_pool.cool_down(key, wait_time):
+                        logger.warning(f"Rate limited by {self.display_name}, retrying with another API key")
+                        continue
+                    logger.warning(f"Rate limited by {self.display_name}. Waiting {wait_time:.1f}s before retry...")
+                    time.sleep(wait_time)
+                    continue
+
+                if status >= 400:
+                    # A 4xx means the provider is up but rejected this request
+                    if status >= 500:
+                        self._breaker.record_failure()
+                    else:
+                        self._breaker.record_success()
+                    logger.error("%s API call failed with HTTP %s", self.display_name, status)
+                    log_error_response(response)
+                    return None
+
+                self._breaker.record_success()
+                data = loads(response.content)
+
+                # Extract response content
+                choices = data.get("choices", [])
+                if not choices:
+                    logger.error("No choices in %s response", self.display_name)
+                    return None
+
+                message = choices[0].get("message", {})
+                content = message.get("content")
+
+                if not content:
+                    logger.error("No content in %s response", self.display_name)
+                    return None
+
+                return content
+
+            except requests.exceptions.RequestException as exc:
+                # Timeouts and connection errors
+                self._breaker.record_failure()
+                logger.error("%s API call failed: %s", self.display_name, exc)
+                return None
+            except Exception as exc:
+                logger.error("%s API call failed: %s", self.display_name, exc, exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
+                return None
+
+        # Also reached with max_retries=0, when no outcome was recorded
+        self._breaker.release()
+        logger.error("Rate limited after max retries")
+        return None
+
+    def stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> Iterator[str]:
+        """
+        Stream response text chunks using the Chat Completions SSE API.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+
+        Yields:
+            Text chunks (nothing on failure)
+        """
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("%s circuit open, skipping streaming call", self.display_name)
+            return
+
+        body = self._build_body(prompt, system_prompt, response_format)
+        body["stream"] = True
+        payload, extra_headers = encode_body(body, self._compress_requests)
+
+        key = self._key_pool.acquire()
+        with key.rate_limiter:
+            try:
+                response = self.session.post(
+                    self._url,
+                    data=payload,
+                    headers={**key.headers, **extra_headers} if extra_headers else key.headers,
+                    timeout=timeout,
+                    stream=True,
+                )
+                with response:
+                    status = response.status_code
+                    if status == 429:
+                        self._breaker.record_failure()
+                        # Later calls use another key while this one cools down
+                        self._key_pool.cool_down(key, retry_delay(response, 0))
+                        logger.warning(f"Rate limited by {self.display_name}, skipping streaming call")
+                        return
+                    if status >= 400:
+                        # A 4xx means the provider is up but rejected this request
+                        if status >= 500:
+                            self._breaker.record_failure()
+                        else:
+                            self._breaker.record_success()
+                        logger.error(f"{self.display_name} streaming call failed with HTTP {status}: {response.text[:500]}")
+                        return
+                    self._breaker.record_success()
+                    for event in iter_sse_data(response):
+                        choices = event.get("choices") or []
+                        if choices:
+                            content = choices[0].get("delta", {}).get("content")
+                            if content:
+                                yield content
+            except requests.exceptions.RequestException as exc:
+                # Timeouts, connection errors and streams cut off midway
+                self._breaker.record_failure()
+                logger.error(f"{self.display_name} streaming call failed: {exc}")
+            except Exception as exc:
+                logger.error(f"{self.display_name} streaming call failed: {exc}", exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
@@ -0,0 +1,308 @@
+"""Shared HTTP session pool for LLM providers.
+
+Providers are re-created frequently (one per planner, one per step executor),
+so sessions are kept at module level and keyed by ``(proxy, host)``. This lets
+keep-alive connections survive provider churn instead of paying a fresh
+TCP + TLS handshake on every new provider instance.
+
+When warm-up is enabled (``LLMConfig.warmup_connections`` or
+``AUTO_DEPLOYER_HTTP_WARMUP=1``), creating the first session for a host also
+sends a background HEAD request that opens a pooled connection, so the first
+real LLM call does not pay DNS + TCP + TLS. It is off by default: offline and
+air-gapped deployments must not see traffic they did not ask for.
+
+Setting ``AUTO_DEPLOYER_HTTP2=1`` (with the ``http2`` extra installed) swaps
+the sessions for an HTTP/2 ``httpx`` client that multiplexes concurrent calls
+to the same host over one connection.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, see the "speedups" extra
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # Optional HTTP/2 transport, see the "http2" extra
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# TCP_NODELAY (urllib3 default) plus keepalive so idle pooled sockets are not
+# silently dropped by NAT gateways between calls
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+WARMUP_TIMEOUT = 5
+# Opt-in connection warm-up for every provider (see also LLMConfig.warmup_connections)
+WARMUP_ENABLED = os.environ.get("AUTO_DEPLOYER_HTTP_WARMUP", "").lower() in ("1", "true", "yes")
+
+# Transport-level retries for failures before the request reached the server
+# (DNS, refused/reset connects), which are safe even for POST. HTTP status
+# retries (429, 5xx) stay in the providers, which rotate API keys and feed
+# the circuit breaker.
+CONNECT_RETRIES = Retry(
+    total=2, connect=2, read=0, status=0, other=0, redirect=0,
+    backoff_factor=0.5, raise_on_status=False,
+)
+
+# Sessions are per API host (plus e.g. batch result storage), so host pools are
+# never evicted; each pool keeps enough idle sockets for every concurrent call
+# (see rate_limiter.DEFAULT_MAX_CONCURRENCY) plus bursts
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
+
+# Environment proxy, resolved once so every provider in a run behaves the same
+DEFAULT_PROXY: Optional[str] = os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+
+# Request bodies below this size are sent uncompressed even when gzip is
+# enabled (LLMConfig.compress_requests): the saving would not pay for itself
+GZIP_MIN_BYTES = 4096
+GZIP_LEVEL = 3
+
+# Opt-in HTTP/2: concurrent calls to one host share a single TLS connection
+HTTP2_ENABLED = os.environ.get("AUTO_DEPLOYER_HTTP2", "").lower() in ("1", "true", "yes")
+
+# (proxy, host) -> pooled session
+_SESSIONS: Dict[Tuple[Optional[str], str], requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that applies keepalive socket options to every pool."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", _SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault("socket_options", _SOCKET_OPTIONS)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def _build_session(proxy: Optional[str]) -> requests.Session:
+    """Create a session with a bounded, pooled adapter."""
+    session = requests.Session()
+    # Bounded pool; pool_block=False lets bursts open extra (unpooled) sockets
+    # instead of blocking
+    adapter = _KeepAliveAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=False,
+        max_retries=CONNECT_RETRIES,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)  # Local OpenAI-compatible endpoints
+    if proxy:
+        session.proxies = {"http": proxy, "https": proxy}
+    return session
+
+
+class _HTTP2Response:
+    """Wrap an ``httpx.Response`` in the subset of the requests API providers use."""
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self) -> Any:
+        return loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} for {self._response.url}", response=self)
+
+    def iter_lines(self) -> Iterator[bytes]:
+        for line in self._response.iter_lines():
+            yield line.encode("utf-8")
+
+    def close(self) -> None:
+        self._response.close()
+
+    def __enter__(self) -> "_HTTP2Response":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _HTTP2Session:
+    """``httpx.Client(http2=True)`` behind the requests.Session methods providers call."""
+
+    def __init__(self, proxy: Optional[str]):
+        self.proxies = {"http": proxy, "https": proxy} if proxy else {}
+        # Same pool bounds and connect retries as the HTTP/1.1 sessions; with
+        # multiplexing, one connection per host usually carries every call
+        transport = httpx.HTTPTransport(
+            http2=True,
+            proxy=proxy,
+            retries=CONNECT_RETRIES.connect,
+            limits=httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_CONNECTIONS),
+        )
+        # The proxy is resolved explicitly (config or DEFAULT_PROXY), so env
+        # proxies must not mount a second, HTTP/1.1-only transport
+        self._client = httpx.Client(transport=transport, trust_env=False)
+
+    def request(self, method: str, url: str, data: Any = None, stream: bool = False, **kwargs) -> _HTTP2Response:
+        # requests takes raw bodies as data=, httpx as content=
+        if isinstance(data, (bytes, str)):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        try:
+            request = self._client.build_request(method, url, **kwargs)
+            return _HTTP2Response(self._client.send(request, stream=stream))
+        except httpx.TimeoutException as exc:
+            raise requests.exceptions.Timeout(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise requests.exceptions.ConnectionError(str(exc)) from exc
+
+    def get(self, url: str, **kwargs) -> _HTTP2Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _HTTP2Response:
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> _HTTP2Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def dumps(obj) -> bytes:
+    """Serialize a request body to compact JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_body(body: Any, compress: bool = False) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize a request body, gzip-compressing large bodies when enabled.
+
+    Args:
+        body: JSON-serializable request body
+        compress: Whether the endpoint accepts ``Content-Encoding: gzip``
+
+    Returns:
+        Body bytes and the extra headers to send with them
+    """
+    data = dumps(body)
+    if compress and len(data) > GZIP_MIN_BYTES:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL), {"Content-Encoding": "gzip"}
+    return data, {}
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON response body (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def log_error_response(response: Optional[requests.Response]) -> None:
+    """Log the body of a failed API response, parsing it only when it is JSON."""
+    if response is None:
+        return
+    if "application/json" in response.headers.get("Content-Type", ""):
+        try:
+            logger.error("Error details: %s", response.json())
+            return
+        except ValueError:
+            pass  # Mislabelled body, log it as text
+    logger.error("Response text: %s", response.text[:500])
+
+
+def iter_sse_data(response: requests.Response) -> Iterator[Dict[str, Any]]:
+    """Yield the JSON payload of each ``data:`` line of a server-sent event stream."""
+    # Iterate raw bytes: text/event-stream has no charset, so requests would
+    # decode it as ISO-8859-1
+    for line in response.iter_lines():
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            break
+        yield loads(data)
+
+
+def _warmup(session: requests.Session, base_url: str) -> None:
+    """Open a pooled connection to the endpoint host; failures are irrelevant."""
+    parts = urlsplit(base_url)
+    try:
+        session.head(f"{parts.scheme}://{parts.netloc}/", timeout=WARMUP_TIMEOUT)
+        logger.debug("Warmed up connection to %s", parts.netloc)
+    except Exception as exc:
+        logger.debug("Connection warm-up to %s failed: %s", parts.netloc, exc)
+
+
+def get_session(proxy: Optional[str] = None, base_url: str = "", warmup: bool = False) -> requests.Session:
+    """
+    Return the shared session for the given proxy and endpoint host.
+
+    If warm-up is requested (or ``AUTO_DEPLOYER_HTTP_WARMUP`` is set), the
+    first call for a key also starts a background warm-up request.
+
+    Args:
+        proxy: Proxy URL or None
+        base_url: Provider endpoint; only the host part is used as key
+        warmup: Pre-open a connection to the endpoint host
+
+    Returns:
+        A pooled ``requests.Session`` shared by all providers with the same key
+    """
+    key = (proxy, urlsplit(base_url).netloc)
+    session = _SESSIONS.get(key)
+    if session is not None:
+        return session
+
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            if HTTP2_ENABLED and httpx is not None:
+                session = _HTTP2Session(proxy)
+            else:
+                if HTTP2_ENABLED:
+                    logger.warning("AUTO_DEPLOYER_HTTP2 is set but httpx is not installed, using HTTP/1.1")
+                session = _build_session(proxy)
+            _SESSIONS[key] = session
+            if key[1] and (warmup or WARMUP_ENABLED):
+                threading.Thread(
+                    target=_warmup, args=(session, base_url), daemon=True
+                ).start()
+        return session
+
+
+def close_sessions() -> None:
+    """Close every pooled session (e.g. at process shutdown or in tests)."""
+    with _SESSIONS_LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+    for session in sessions:
+        session.close()
@@ -8,14 +8,12 @@ from __future__ import annotations
 
 import json
 import logging
-import os
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 
-import requests
-
 from ..config import LLMConfig
+from ._http import loads
 
 if TYPE_CHECKING:
     from ..analyzer import RepoContext
@@ -34,6 +32,19 @@ class DeploymentStep:
     success_criteria: str = ""                   # 成功标准
     depends_on: List[int] = field(default_factory=list)  # 依赖的步骤ID
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeploymentStep":
+        """从 LLM 返回的步骤字典构建（缺少 id/name 时抛出 KeyError）"""
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            description=data.get("description", ""),
+            category=data.get("category", "setup"),
+            estimated_commands=data.get("estimated_commands", []),
+            success_criteria=data.get("success_criteria", ""),
+            depends_on=data.get("depends_on", []),
+        )
+
 
 @dataclass
 class DeploymentPlan:
@@ -46,6 +57,18 @@ class DeploymentPlan:
     estimated_time: str = ""                     # 预计时间
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeploymentPlan":
+        """从 LLM 返回的方案字典构建（缺少 strategy/steps 时抛出 KeyError）"""
+        return cls(
+            strategy=data["strategy"],
+            components=data.get("components", []),
+            steps=[DeploymentStep.from_dict(step) for step in data["steps"]],
+            risks=data.get("risks", []),
+            notes=data.get("notes", []),
+            estimated_time=data.get("estimated_time", ""),
+        )
+    
     def to_dict(self) -> dict:
         """转换为字典用于日志记录"""
         return {
@@ -92,15 +115,8 @@ class DeploymentPlanner:
         self.llm_provider = create_llm_provider(config)
         logger.info("Planner using LLM: %s (model: %s)", config.provider, config.model)
 
-        # Keep session for backward compatibility with proxies
-        self.session = requests.Session()
-        self._setup_proxy()
-
-    def _setup_proxy(self) -> None:
-        """Configure proxy if specified."""
-        proxy = self.config.proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
-        if proxy:
-            self.session.proxies = {"http": proxy, "https": proxy}
+        # Kept for backward compatibility: the provider's pooled, proxied session
+        self.session = self.llm_provider.session
 
     def create_plan(
         self,
@@ -215,7 +231,7 @@ class DeploymentPlanner:
                 return None
             
             json_str = llm_response[start_idx:end_idx]
-            data = json.loads(json_str)
+            data = loads(json_str)
             
             # Handle nested plan structure (some LLMs return {reasoning: {...}, plan: {...}})
             if "plan" in data and isinstance(data["plan"], dict):
@@ -230,30 +246,7 @@ class DeploymentPlanner:
                 logger.error("Response preview: %s", json_str[:500])
                 return None
             
-            # Parse steps
-            steps = []
-            for step_data in plan_data["steps"]:
-                step = DeploymentStep(
-                    id=step_data["id"],
-                    name=step_data["name"],
-                    description=step_data.get("description", ""),
-                    category=step_data.get("category", "setup"),
-                    estimated_commands=step_data.get("estimated_commands", []),
-                    success_criteria=step_data.get("success_criteria", ""),
-                    depends_on=step_data.get("depends_on", []),
-                )
-                steps.append(step)
-            
-            plan = DeploymentPlan(
-                strategy=plan_data["strategy"],
-                components=plan_data.get("components", []),
-                steps=steps,
-                risks=plan_data.get("risks", []),
-                notes=plan_data.get("notes", []),
-                estimated_time=plan_data.get("estimated_time", ""),
-            )
-            
-            return plan
+            return DeploymentPlan.from_dict(plan_data)
             
         except json.JSONDecodeError as e:
             logger.error("JSON parse error: %s", e)
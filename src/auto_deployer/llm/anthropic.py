@@ -2,20 +2,32 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import time
-from typing import TYPE_CHECKING, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
 
 import requests
 
+from ._http import DEFAULT_PROXY, dumps, encode_body, get_session, iter_sse_data, loads, log_error_response
+from .base import (
+    BATCH_POLL_TIMEOUT,
+    BaseLLMProvider,
+    cacheable_system_prompt,
+    cached,
+    coalesce_inflight,
+    poll_batch,
+)
+from .circuit_breaker import get_circuit_breaker
+from .rate_limiter import get_rate_limiter, retry_delay
+
 if TYPE_CHECKING:
     from ..config import LLMConfig
 
 logger = logging.getLogger(__name__)
 
 
-class AnthropicProvider:
+class AnthropicProvider(BaseLLMProvider):
     """Anthropic Claude LLM provider using official API."""
 
     def __init__(self, config: "LLMConfig"):
@@ -29,13 +41,10 @@ class AnthropicProvider:
             raise ValueError("Anthropic API key is required")
 
         self.config = config
-        self.session = requests.Session()
 
         # Set up proxy if configured
-        import os
-        proxy = config.proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+        proxy = config.proxy or DEFAULT_PROXY
         if proxy:
-            self.session.proxies = {"http": proxy, "https": proxy}
             logger.info("Anthropic provider using proxy: %s", proxy)
 
         # Anthropic API endpoint
@@ -44,6 +53,50 @@ class AnthropicProvider:
         self.model = config.model or "claude-3-5-sonnet-20241022"
         self.temperature = config.temperature
 
+        # Static request scaffolding, built once instead of on every call
+        self._url = f"{self.base_url}/messages"
+        self._batch_url = f"{self._url}/batches"
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
+        }
+        self._headers = MappingProxyType(headers)
+        self._body_base = {"model": self.model, "max_tokens": 4096, "temperature": self.temperature}
+
+        # Pooled session shared with other providers talking to the same host
+        self.session = get_session(proxy, self.base_url, getattr(config, "warmup_connections", False))
+        self._rate_limiter = get_rate_limiter(
+            "anthropic", config.requests_per_minute, config.max_concurrency
+        )
+        self._compress_requests = getattr(config, "compress_requests", False)
+        self._breaker = get_circuit_breaker("anthropic", self.base_url)
+
+    def _build_body(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        response_format: str,
+    ) -> dict:
+        """Build a Messages API request body."""
+        body = {
+            **self._body_base,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+        # Add system prompt if provided
+        if system_prompt:
+            # For JSON format, append instruction to system prompt
+            if response_format == "json":
+                system_prompt += "\n\nIMPORTANT: You MUST respond with valid JSON only, no markdown, no explanation."
+            body["system"] = cacheable_system_prompt(system_prompt)
+
+        return body
+
+    @cached
+    @coalesce_inflight
     def generate_response(
         self,
         prompt: str,
@@ -65,50 +118,47 @@ class AnthropicProvider:
         Returns:
             Generated text or None on failure
         """
-        url = f"{self.base_url}/messages"
+        body = self._build_body(prompt, system_prompt, response_format)
 
-        # Build request body
-        body = {
-            "model": self.model,
-            "max_tokens": 4096,
-            "temperature": self.temperature,
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
-        }
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("Anthropic circuit open, skipping API call")
+            return None
 
-        # Add system prompt if provided
-        if system_prompt:
-            # For JSON format, append instruction to system prompt
-            if response_format == "json":
-                system_prompt += "\n\nIMPORTANT: You MUST respond with valid JSON only, no markdown, no explanation."
-            body["system"] = system_prompt
-
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
-        }
+        payload, extra_headers = encode_body(body, self._compress_requests)
 
         # Retry loop for rate limiting
         for attempt in range(max_retries):
             try:
-                response = self.session.post(
-                    url,
-                    json=body,
-                    headers=headers,
-                    timeout=timeout
-                )
+                with self._rate_limiter:
+                    response = self.session.post(
+                        self._url,
+                        data=payload,
+                        headers={**self._headers, **extra_headers} if extra_headers else self._headers,
+                        timeout=timeout
+                    )
 
                 # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited by Anthropic. Waiting {wait_time}s before retry...")
+                status = response.status_code
+                if status == 429:
+                    self._breaker.record_failure()
+                    wait_time = retry_delay(response, attempt)
+                    logger.warning(f"Rate limited by Anthropic. Waiting {wait_time:.1f}s before retry...")
                     time.sleep(wait_time)
                     continue
 
-                response.raise_for_status()
-                data = response.json()
+                if status >= 400:
+                    # A 4xx means the provider is up but rejected this request
+                    if status >= 500:
+                        self._breaker.record_failure()
+                    else:
+                        self._breaker.record_success()
+                    logger.error("Anthropic API call failed with HTTP %s", status)
+                    log_error_response(response)
+                    return None
+
+                self._breaker.record_success()
+                data = loads(response.content)
 
                 # Extract response content
                 content_blocks = data.get("content", [])
@@ -125,23 +175,170 @@ class AnthropicProvider:
 
                 return text
 
-            except requests.exceptions.HTTPError as e:
-                if response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-                logger.error(f"Anthropic API call failed: {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_data = e.response.json()
-                        logger.error(f"Error details: {error_data}")
-                    except:
-                        logger.error(f"Response text: {e.response.text[:500]}")
+            except requests.exceptions.RequestException as exc:
+                # Timeouts and connection errors
+                self._breaker.record_failure()
+                logger.error("Anthropic API call failed: %s", exc)
                 return None
             except Exception as exc:
-                logger.error(f"Anthropic API call failed: {exc}")
+                logger.error("Anthropic API call failed: %s", exc, exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
                 return None
 
+        # Also reached with max_retries=0, when no outcome was recorded
+        self._breaker.release()
         logger.error("Rate limited after max retries")
         return None
+
+    def stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> Iterator[str]:
+        """
+        Stream response text chunks using the Messages API event stream.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+
+        Yields:
+            Text chunks (nothing on failure)
+        """
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("Anthropic circuit open, skipping streaming call")
+            return
+
+        body = self._build_body(prompt, system_prompt, response_format)
+        body["stream"] = True
+        payload, extra_headers = encode_body(body, self._compress_requests)
+
+        with self._rate_limiter:
+            try:
+                response = self.session.post(
+                    self._url,
+                    data=payload,
+                    headers={**self._headers, **extra_headers} if extra_headers else self._headers,
+                    timeout=timeout,
+                    stream=True,
+                )
+                with response:
+                    status = response.status_code
+                    if status == 429:
+                        self._breaker.record_failure()
+                        logger.warning("Rate limited by Anthropic, skipping streaming call")
+                        return
+                    if status >= 400:
+                        # A 4xx means the provider is up but rejected this request
+                        if status >= 500:
+                            self._breaker.record_failure()
+                        else:
+                            self._breaker.record_success()
+                        logger.error(f"Anthropic streaming call failed with HTTP {status}: {response.text[:500]}")
+                        return
+                    self._breaker.record_success()
+                    for event in iter_sse_data(response):
+                        event_type = event.get("type")
+                        if event_type == "content_block_delta":
+                            text = event.get("delta", {}).get("text")
+                            if text:
+                                yield text
+                        elif event_type == "error":
+                            # Overload and API errors reported inside the stream
+                            self._breaker.record_failure()
+                            logger.error(f"Anthropic stream error: {event.get('error')}")
+                            return
+            except requests.exceptions.RequestException as exc:
+                # Timeouts, connection errors and streams cut off midway
+                self._breaker.record_failure()
+                logger.error(f"Anthropic streaming call failed: {exc}")
+            except Exception as exc:
+                logger.error(f"Anthropic streaming call failed: {exc}", exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
+
+    def batch_generate(
+        self,
+        prompts: List[Tuple[str, Optional[str]]],
+        response_format: str = "json",
+        timeout: int = 60,
+        poll_timeout: int = BATCH_POLL_TIMEOUT,
+    ) -> List[Optional[str]]:
+        """
+        Generate responses via the Message Batches API (half price, async).
+
+        Only suitable for non-latency-critical work: batches can take minutes.
+        Falls back to per-prompt requests if the batch cannot be submitted.
+
+        Args:
+            prompts: List of (prompt, system_prompt) tuples
+            response_format: "json" or "text"
+            timeout: Timeout for each HTTP request in seconds
+            poll_timeout: Maximum time to wait for the batch to finish
+
+        Returns:
+            Responses aligned with ``prompts`` (None for failed items)
+        """
+        if not prompts:
+            return []
+
+        url = self._batch_url
+        headers = self._headers
+        batch_requests = [
+            {
+                "custom_id": f"req-{i}",
+                "params": self._build_body(prompt, system_prompt, response_format),
+            }
+            for i, (prompt, system_prompt) in enumerate(prompts)
+        ]
+
+        try:
+            response = self.session.post(
+                url, data=dumps({"requests": batch_requests}), headers=headers, timeout=timeout
+            )
+            response.raise_for_status()
+            batch_id = loads(response.content)["id"]
+        except Exception as exc:
+            logger.warning(f"Anthropic batch submission failed ({exc}), sending prompts individually")
+            return super().batch_generate(prompts, response_format=response_format, timeout=timeout)
+
+        logger.info(f"Submitted Anthropic message batch {batch_id} ({len(prompts)} prompts)")
+
+        def _fetch() -> dict:
+            status_response = self.session.get(f"{url}/{batch_id}", headers=headers, timeout=timeout)
+            status_response.raise_for_status()
+            return loads(status_response.content)
+
+        results: List[Optional[str]] = [None] * len(prompts)
+        try:
+            batch = poll_batch(_fetch, lambda b: b.get("processing_status") == "ended", poll_timeout)
+            if batch is None or not batch.get("results_url"):
+                return results
+
+            results_response = self.session.get(batch["results_url"], headers=headers, timeout=timeout)
+            results_response.raise_for_status()
+        except Exception as exc:
+            logger.error(f"Anthropic batch {batch_id} failed: {exc}")
+            return results
+
+        # Results are JSONL and not guaranteed to be in submission order
+        for line in results_response.text.splitlines():
+            if not line.strip():
+                continue
+            item = loads(line)
+            index = int(item["custom_id"].split("-", 1)[1])
+            result = item.get("result", {})
+            if result.get("type") != "succeeded":
+                logger.error(f"Batch item {item['custom_id']} {result.get('type')}: {result.get('error')}")
+                continue
+            content_blocks = result.get("message", {}).get("content", [])
+            if content_blocks:
+                results[index] = content_blocks[0].get("text")
+
+        return results
@@ -2,16 +2,183 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 if TYPE_CHECKING:
+    import requests
+
     from ..config import LLMConfig
 
+logger = logging.getLogger(__name__)
+
+# Parallel requests used by the default batch_generate fallback
+BATCH_CONCURRENCY = 4
+# Upper bound for waiting on provider-side batch jobs (seconds)
+BATCH_POLL_TIMEOUT = 3600
+# System prompts at least this long are marked for Anthropic prompt caching
+# (shorter prefixes are below the provider's cacheable minimum anyway)
+PROMPT_CACHE_MIN_CHARS = 1024
+
+# request key -> future of the call currently sending it
+_INFLIGHT: Dict[str, "Future[Optional[str]]"] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def cacheable_system_prompt(system_prompt: str) -> Any:
+    """
+    Return an Anthropic-style system prompt that marks a long prefix as cacheable.
+
+    The static system prompts (e.g. ``COMPRESSION_SYSTEM_PROMPT``) are
+    byte-identical across calls, so the provider can reuse the prefill of the
+    cached prefix. Short prompts are returned unchanged as plain strings.
+    """
+    if len(system_prompt) < PROMPT_CACHE_MIN_CHARS:
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def request_key(
+    provider: "BaseLLMProvider",
+    prompt: str,
+    system_prompt: Optional[str],
+    response_format: str,
+) -> str:
+    """Hash everything that determines a provider's response to a prompt."""
+    payload = [
+        type(provider).__name__,
+        # Endpoint: OpenAI-compatible servers may serve the same model name
+        getattr(provider, "base_url", None) or getattr(provider, "base_endpoint", None),
+        getattr(provider, "model", None),
+        getattr(provider, "temperature", None),
+        (getattr(provider, "_body_base", None) or {}).get("max_tokens"),
+        response_format,
+        system_prompt,
+        prompt,
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _samples_randomly(provider: "BaseLLMProvider") -> bool:
+    """Whether the provider samples above ``EXACT_CACHE_MAX_TEMPERATURE``."""
+    from .cache import EXACT_CACHE_MAX_TEMPERATURE
+
+    return (getattr(provider, "temperature", None) or 0.0) > EXACT_CACHE_MAX_TEMPERATURE
+
+
+def cached(method: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+    """
+    Decorate ``generate_response`` with the response caches.
+
+    Identical requests are answered from the process-wide in-memory cache
+    and, when ``AUTO_DEPLOYER_LLM_CACHE=1`` is set, from the persistent disk
+    cache (see ``cache.ExactMatchCache`` and ``cache.DiskCache``). Providers
+    configured to sample above ``EXACT_CACHE_MAX_TEMPERATURE`` are never
+    cached, so repeated prompts still get independent samples. The check
+    uses the temperature the provider was created with.
+    Only successful responses are stored.
+    """
+
+    @functools.wraps(method)
+    def wrapper(
+        self: "BaseLLMProvider",
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+        max_retries: int = 3,
+    ) -> Optional[str]:
+        from .cache import get_disk_cache, get_exact_cache
+
+        if _samples_randomly(self):
+            return method(self, prompt, system_prompt, response_format, timeout, max_retries)
+
+        key = request_key(self, prompt, system_prompt, response_format)
+        memory_cache = get_exact_cache()
+        text = memory_cache.get(key)
+        if text is not None:
+            logger.debug("LLM cache hit %s", key[:12])
+            return text
+
+        disk_cache = get_disk_cache()
+        if disk_cache is not None:
+            text = disk_cache.get(key)
+            if text is not None:
+                logger.debug("LLM disk cache hit %s", key[:12])
+                memory_cache.set(key, text)
+                return text
+
+        text = method(self, prompt, system_prompt, response_format, timeout, max_retries)
+        if text is not None:
+            memory_cache.set(key, text)
+            if disk_cache is not None:
+                disk_cache.set(key, text)
+        return text
+
+    return wrapper
+
+
+def coalesce_inflight(method: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+    """
+    Decorate ``generate_response`` so identical concurrent calls share one request.
+
+    The first caller sends the request; callers with the same prompt that
+    arrive while it is in flight wait for and return its result. Like
+    ``cached``, providers sampling above ``EXACT_CACHE_MAX_TEMPERATURE`` are
+    left alone so that concurrent callers draw independent samples.
+    """
+
+    @functools.wraps(method)
+    def wrapper(
+        self: "BaseLLMProvider",
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+        max_retries: int = 3,
+    ) -> Optional[str]:
+        if _samples_randomly(self):
+            return method(self, prompt, system_prompt, response_format, timeout, max_retries)
+
+        key = request_key(self, prompt, system_prompt, response_format)
+        with _INFLIGHT_LOCK:
+            future = _INFLIGHT.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                _INFLIGHT[key] = future
+
+        if not is_owner:
+            logger.debug("Joining in-flight request %s", key[:12])
+            return future.result()
+
+        try:
+            result = method(self, prompt, system_prompt, response_format, timeout, max_retries)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(key, None)
+
+    return wrapper
+
 
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    session: Optional["requests.Session"] = None
+
     @abstractmethod
     def generate_response(
         self,
@@ -36,11 +203,188 @@ class BaseLLMProvider(ABC):
         """
         pass
 
+    def stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> Iterator[str]:
+        """
+        Stream the response text in chunks as the LLM generates it.
+
+        The default implementation yields the complete response as a single
+        chunk; providers with a streaming API override this. Callers that need
+        the full text can ``"".join(...)`` the chunks.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+
+        Yields:
+            Text chunks (nothing on failure)
+        """
+        text = self.generate_response(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            response_format=response_format,
+            timeout=timeout,
+        )
+        if text:
+            yield text
+
+    def batch_generate(
+        self,
+        prompts: List[Tuple[str, Optional[str]]],
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> List[Optional[str]]:
+        """
+        Generate responses for many independent prompts.
+
+        The default implementation fans out ``generate_response`` over a small
+        thread pool. Providers with a native batch API override this.
+
+        Args:
+            prompts: List of (prompt, system_prompt) tuples
+            response_format: "json" or "text"
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Responses aligned with ``prompts`` (None for failed items)
+        """
+        if not prompts:
+            return []
+
+        def _generate(item: Tuple[str, Optional[str]]) -> Optional[str]:
+            prompt, system_prompt = item
+            return self.generate_response(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                response_format=response_format,
+                timeout=timeout,
+            )
+
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(prompts))) as pool:
+            return list(pool.map(_generate, prompts))
+
+    async def agenerate_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+        max_retries: int = 3,
+    ) -> Optional[str]:
+        """
+        Async variant of ``generate_response``.
+
+        The request (including any rate-limit backoff) runs in a worker
+        thread, so independent calls awaited together overlap instead of
+        blocking the event loop one after another.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+            max_retries: Maximum number of retries on rate limit
+
+        Returns:
+            Generated text or None on failure
+        """
+        return await asyncio.to_thread(
+            self.generate_response, prompt, system_prompt, response_format, timeout, max_retries
+        )
+
+    async def abatch_generate(
+        self,
+        prompts: List[Tuple[str, Optional[str]]],
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> List[Optional[str]]:
+        """
+        Generate responses for many independent prompts concurrently.
+
+        Concurrency is still capped by the provider's rate limiter.
+
+        Args:
+            prompts: List of (prompt, system_prompt) tuples
+            response_format: "json" or "text"
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            Responses aligned with ``prompts`` (None for failed items)
+        """
+        return list(await asyncio.gather(*(
+            self.agenerate_response(prompt, system_prompt, response_format, timeout)
+            for prompt, system_prompt in prompts
+        )))
+
+    def close(self) -> None:
+        """
+        Release the provider's HTTP session.
+
+        Sessions are pooled per host and shared between providers (see
+        ``_http.get_session``), so this only drops the provider's reference.
+        Use ``_http.close_sessions()`` to close the underlying sockets.
+        """
+        self.session = None
+
+    def __enter__(self) -> "BaseLLMProvider":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def poll_batch(
+    fetch: Callable[[], Dict[str, Any]],
+    is_done: Callable[[Dict[str, Any]], bool],
+    poll_timeout: int = BATCH_POLL_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """
+    Poll a provider-side batch job with exponential backoff.
+
+    Args:
+        fetch: Returns the current batch status payload
+        is_done: Whether the payload describes a finished batch
+        poll_timeout: Maximum total wait in seconds
+
+    Returns:
+        The final status payload, or None if the batch did not finish in time
+    """
+    deadline = time.monotonic() + poll_timeout
+    delay = 2.0
+    while True:
+        status = fetch()
+        if is_done(status):
+            return status
+        if time.monotonic() + delay > deadline:
+            logger.error("Batch did not finish within %ss", poll_timeout)
+            return None
+        time.sleep(delay)
+        delay = min(delay * 1.5, 60.0)
+
 
 def create_llm_provider(config: "LLMConfig") -> BaseLLMProvider:
     """
     Factory function to create the appropriate LLM provider based on config.
 
+    Providers can be used as context managers to release their session
+    when done::
+
+        with create_llm_provider(config) as provider:
+            text = provider.generate_response(prompt)
+
     Args:
         config: LLM configuration
 
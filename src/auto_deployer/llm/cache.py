@@ -0,0 +1,305 @@
+"""Response caches for LLM calls.
+
+``ExactMatchCache`` answers byte-identical requests (same provider, model,
+prompts and format) from memory for the lifetime of the process, e.g. when
+``HistoryCompressor`` re-compresses an unchanged command list.
+
+``DiskCache`` persists exact responses across runs when
+``AUTO_DEPLOYER_LLM_CACHE=1`` is set, which saves API round-trips while
+iterating on the same repository.
+
+``SemanticCache`` returns a cached response for prompts that are semantically
+near-identical to an earlier one, e.g. failure records that differ only in a
+PID, timestamp or temp path. Embeddings come from sentence-transformers (the
+``memory`` extra); without it the cache silently stays empty. With
+``AUTO_DEPLOYER_SEMANTIC_CACHE=1`` it also reuses command-history summaries
+across steps with near-identical commands.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from ..paths import get_llm_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# In-memory exact-match cache: entry lifetime (seconds) and size bound
+EXACT_CACHE_TTL = 3600
+EXACT_CACHE_MAX_ENTRIES = 1024
+# Responses sampled above this temperature are not meant to be reproducible
+EXACT_CACHE_MAX_TEMPERATURE = 0.2
+
+# Disk cache entries older than this are ignored and removed (seconds)
+LLM_CACHE_TTL = 7 * 24 * 3600
+
+# Minimum cosine similarity for a semantic cache hit
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# Entries kept per namespace (oldest evicted first)
+SEMANTIC_CACHE_MAX_ENTRIES = 512
+# Command histories must be closer than failure records to share a summary
+HISTORY_CACHE_THRESHOLD = 0.95
+
+# Volatile fragments that do not change the meaning of a failure record
+_NORMALIZE_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"), "<time>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<time>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-f]{8,}\b"), "<hex>"),
+    (re.compile(r"(?:/[\w.@+-]+){2,}/?"), "<path>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"[ \t]+"), " "),
+]
+
+
+class ExactMatchCache:
+    """Thread-safe in-memory LRU of responses keyed by request hash, with TTL."""
+
+    def __init__(self, ttl: float = EXACT_CACHE_TTL, max_entries: int = EXACT_CACHE_MAX_ENTRIES):
+        """
+        Initialize exact-match cache.
+
+        Args:
+            ttl: Entry lifetime in seconds
+            max_entries: Maximum number of entries (least recently used evicted)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (text, stored at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for a request key, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            text, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def set(self, key: str, text: str) -> None:
+        """Store the text for a request key."""
+        with self._lock:
+            self._entries[key] = (text, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide: planner, executor and compressor each create their own provider
+_EXACT_CACHE = ExactMatchCache()
+
+
+def get_exact_cache() -> ExactMatchCache:
+    """Return the process-wide exact-match response cache."""
+    return _EXACT_CACHE
+
+
+class DiskCache:
+    """Exact-match response cache stored as one JSON file per request key."""
+
+    def __init__(self, directory: Path, ttl: float = LLM_CACHE_TTL):
+        """
+        Initialize disk cache.
+
+        Args:
+            directory: Cache directory (created if missing)
+            ttl: Entry lifetime in seconds
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for a request key, or None if missing/expired."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("ts", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("text")
+
+    def set(self, key: str, text: str) -> None:
+        """Store the text for a request key (atomic, safe for concurrent runs)."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text, "ts": time.time()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.debug(f"Failed to write LLM cache entry: {exc}")
+
+
+# AUTO_DEPLOYER_LLM_CACHE_DIR value -> cache, so the directory is resolved
+# (and created) once instead of on every LLM call
+_DISK_CACHES: Dict[Optional[str], DiskCache] = {}
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Return the disk cache if AUTO_DEPLOYER_LLM_CACHE is enabled, else None."""
+    if os.environ.get("AUTO_DEPLOYER_LLM_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    directory = os.environ.get("AUTO_DEPLOYER_LLM_CACHE_DIR")
+    disk_cache = _DISK_CACHES.get(directory)
+    if disk_cache is None:
+        disk_cache = _DISK_CACHES.setdefault(directory, DiskCache(get_llm_cache_dir()))
+    return disk_cache
+
+
+def normalize_prompt(text: str) -> str:
+    """Strip timestamps, ids, paths and numbers so similar failures embed alike."""
+    for pattern, replacement in _NORMALIZE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache keyed by prompt embeddings."""
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        embedding_model: str = "all-MiniLM-L6-v2",
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        """
+        Initialize semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity to return a cached response
+            max_entries: Maximum entries per namespace
+            embedding_model: sentence-transformers model name
+            embed_fn: Custom text -> vector function (skips sentence-transformers)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self._embed_fn = embed_fn
+        self._disabled = False
+        # namespace -> (unit embedding, response)
+        self._entries: Dict[str, Deque[Tuple[List[float], str]]] = {}
+        self._lock = threading.Lock()
+
+    def _load_model(self) -> Optional[Callable[[str], Sequence[float]]]:
+        """Lazily load the embedding model; disable the cache if unavailable."""
+        if self._embed_fn is not None or self._disabled:
+            return self._embed_fn
+
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            logger.info("sentence-transformers not installed, semantic cache disabled")
+            self._disabled = True
+            return None
+
+        # Same as the knowledge store: prefer the locally cached model
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        try:
+            model = SentenceTransformer(self.embedding_model, local_files_only=True)
+        except Exception as exc:
+            logger.info(f"Embedding model {self.embedding_model} unavailable ({exc}), semantic cache disabled")
+            self._disabled = True
+            return None
+
+        self._embed_fn = lambda text: model.encode(text, normalize_embeddings=True).tolist()
+        return self._embed_fn
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        embed_fn = self._load_model()
+        if embed_fn is None:
+            return None
+        vector = list(embed_fn(normalize_prompt(text)))
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """
+        Return the cached response of the most similar earlier prompt.
+
+        Args:
+            namespace: Cache partition, e.g. provider and model
+            text: Prompt (normalized before embedding)
+
+        Returns:
+            Cached response if the best match reaches the threshold, else None
+        """
+        entries = self._entries.get(namespace)
+        if not entries:
+            return None
+        vector = self._embed(text)
+        if vector is None:
+            return None
+
+        best_score, best_response = -1.0, None
+        with self._lock:
+            for cached_vector, response in entries:
+                score = sum(a * b for a, b in zip(vector, cached_vector))
+                if score > best_score:
+                    best_score, best_response = score, response
+
+        if best_score >= self.threshold:
+            logger.debug(f"Semantic cache hit in {namespace} (similarity {best_score:.3f})")
+            return best_response
+        return None
+
+    def put(self, namespace: str, text: str, response: str) -> None:
+        """
+        Store a response for a prompt.
+
+        Args:
+            namespace: Cache partition, e.g. provider and model
+            text: Prompt (normalized before embedding)
+            response: LLM response to reuse for similar prompts
+        """
+        vector = self._embed(text)
+        if vector is None:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(namespace, deque(maxlen=self.max_entries))
+            entries.append((vector, response))
+
+
+_HISTORY_CACHE: Optional[SemanticCache] = None
+_HISTORY_CACHE_LOCK = threading.Lock()
+
+
+def get_history_cache() -> Optional[SemanticCache]:
+    """Return the shared history-compression cache if AUTO_DEPLOYER_SEMANTIC_CACHE is enabled."""
+    global _HISTORY_CACHE
+    if os.environ.get("AUTO_DEPLOYER_SEMANTIC_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    with _HISTORY_CACHE_LOCK:
+        # Shared: every step executor creates its own HistoryCompressor
+        if _HISTORY_CACHE is None:
+            _HISTORY_CACHE = SemanticCache(threshold=HISTORY_CACHE_THRESHOLD)
+        return _HISTORY_CACHE
@@ -0,0 +1,148 @@
+"""Circuit breaker for LLM providers.
+
+After sustained failures (5xx, 429, timeouts) every further call would still
+pay the full request timeout. The breaker opens after too many failures in a
+short window so callers get ``None`` immediately and can fall back, then lets
+a single trial request through once the cool-down has elapsed. A trial that
+ends without an outcome (see ``CircuitBreaker.release``) or never reports back
+within ``TRIAL_TIMEOUT`` does not keep the circuit half-open.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Failures within FAILURE_WINDOW seconds that open the circuit
+FAILURE_THRESHOLD = 5
+FAILURE_WINDOW = 60
+# Seconds the circuit stays open before a trial request is allowed
+RECOVERY_TIMEOUT = 30
+# Seconds after which an unanswered trial request no longer blocks a new one
+TRIAL_TIMEOUT = 120
+
+
+class CircuitBreaker:
+    """Thread-safe CLOSED -> OPEN -> HALF_OPEN circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        failure_window: float = FAILURE_WINDOW,
+        recovery_timeout: float = RECOVERY_TIMEOUT,
+        trial_timeout: float = TRIAL_TIMEOUT,
+    ):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            name: Provider name used in log messages
+            failure_threshold: Failures within the window that open the circuit
+            failure_window: Sliding window for counting failures (seconds)
+            recovery_timeout: Time the circuit stays open (seconds)
+            trial_timeout: Time after which a half-open trial is given up (seconds)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.recovery_timeout = recovery_timeout
+        self.trial_timeout = trial_timeout
+        self.state = CLOSED
+        self._failures: Deque[float] = deque()
+        self._opened_at = 0.0
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return False while the circuit is open and the call should be skipped."""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self._opened_at >= self.recovery_timeout:
+                # Let exactly one trial request through
+                self.state = HALF_OPEN
+                self._trial_started_at = now
+                logger.info(f"{self.name} circuit half-open, sending trial request")
+                return True
+            if self.state == HALF_OPEN and now - self._trial_started_at >= self.trial_timeout:
+                # The previous trial never reported back, send another one
+                self._trial_started_at = now
+                logger.info(f"{self.name} trial request timed out, sending another")
+                return True
+            return False
+
+    def release(self) -> None:
+        """
+        End a call that recorded neither success nor failure.
+
+        If it was the half-open trial, the next call may become the trial
+        right away instead of being refused until the trial times out.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self._opened_at = time.monotonic() - self.recovery_timeout
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} circuit closed, provider recovered")
+            self.state = CLOSED
+            self._failures.clear()
+
+    def record_failure(self) -> None:
+        """Count a provider failure, opening the circuit when over threshold."""
+        now = time.monotonic()
+        with self._lock:
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.failure_window:
+                self._failures.popleft()
+
+            if self.state == HALF_OPEN or len(self._failures) >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(
+                        f"{self.name} circuit open after {len(self._failures)} failures, "
+                        f"skipping calls for {self.recovery_timeout}s"
+                    )
+                self.state = OPEN
+                self._opened_at = now
+
+
+# Breakers are process-wide: providers are re-created often, outages are not.
+# Keyed by provider and endpoint host, so one dead OpenAI-compatible server
+# does not block calls to another.
+_BREAKERS: Dict[Tuple[str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, base_url: str = "") -> CircuitBreaker:
+    """
+    Return the shared circuit breaker for a provider endpoint.
+
+    Args:
+        provider: Provider name
+        base_url: Provider endpoint; only the host part is used as key
+
+    Returns:
+        CircuitBreaker shared by all instances talking to the same host
+    """
+    key = (provider, urlsplit(base_url).netloc)
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(f"{provider} ({key[1]})" if key[1] else provider)
+            _BREAKERS[key] = breaker
+        return breaker
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-import json
 import logging
-import time
-from typing import TYPE_CHECKING, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING
 
-import requests
+from ._chat import ChatCompletionsProvider
+from ._http import DEFAULT_PROXY, get_session
+from .circuit_breaker import get_circuit_breaker
+from .rate_limiter import get_rate_limiter
 
 if TYPE_CHECKING:
     from ..config import LLMConfig
@@ -15,9 +17,11 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-class DeepSeekProvider:
+class DeepSeekProvider(ChatCompletionsProvider):
     """DeepSeek LLM provider using OpenAI-compatible API."""
 
+    display_name = "DeepSeek"
+
     def __init__(self, config: "LLMConfig"):
         """
         Initialize DeepSeek provider.
@@ -29,13 +33,10 @@ class DeepSeekProvider:
             raise ValueError("DeepSeek API key is required")
 
         self.config = config
-        self.session = requests.Session()
 
         # Set up proxy if configured
-        import os
-        proxy = config.proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+        proxy = config.proxy or DEFAULT_PROXY
         if proxy:
-            self.session.proxies = {"http": proxy, "https": proxy}
             logger.info("DeepSeek provider using proxy: %s", proxy)
 
         # DeepSeek uses OpenAI-compatible API
@@ -44,103 +45,20 @@ class DeepSeekProvider:
         self.model = config.model or "deepseek-chat"
         self.temperature = config.temperature
 
-    def generate_response(
-        self,
-        prompt: str,
-        system_prompt: Optional[str] = None,
-        response_format: str = "json",
-        timeout: int = 60,
-        max_retries: int = 3,
-    ) -> Optional[str]:
-        """
-        Generate a response from DeepSeek.
-
-        Args:
-            prompt: User prompt
-            system_prompt: Optional system prompt
-            response_format: "json" or "text"
-            timeout: Request timeout in seconds
-            max_retries: Maximum number of retries on rate limit
-
-        Returns:
-            Generated text or None on failure
-        """
-        url = f"{self.base_url}/chat/completions"
-
-        # Build messages
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        # Build request body
-        body = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": self.temperature,
-        }
-
-        # Add response format if JSON is requested
-        if response_format == "json":
-            body["response_format"] = {"type": "json_object"}
-
+        # Static request scaffolding, built once instead of on every call
+        self._url = f"{self.base_url}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-
-        # Retry loop for rate limiting
-        for attempt in range(max_retries):
-            try:
-                response = self.session.post(
-                    url,
-                    json=body,
-                    headers=headers,
-                    timeout=timeout
-                )
-
-                # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited by DeepSeek. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-
-                response.raise_for_status()
-                data = response.json()
-
-                # Extract response content
-                choices = data.get("choices", [])
-                if not choices:
-                    logger.error("No choices in DeepSeek response")
-                    return None
-
-                message = choices[0].get("message", {})
-                content = message.get("content")
-
-                if not content:
-                    logger.error("No content in DeepSeek response")
-                    return None
-
-                return content
-
-            except requests.exceptions.HTTPError as e:
-                if response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-                logger.error(f"DeepSeek API call failed: {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_data = e.response.json()
-                        logger.error(f"Error details: {error_data}")
-                    except:
-                        logger.error(f"Response text: {e.response.text[:500]}")
-                return None
-            except Exception as exc:
-                logger.error(f"DeepSeek API call failed: {exc}")
-                return None
-
-        logger.error("Rate limited after max retries")
-        return None
+        self._headers = MappingProxyType(headers)
+        self._body_base = {"model": self.model, "temperature": self.temperature}
+
+        # Pooled session shared with other providers talking to the same host
+        self.session = get_session(proxy, self.base_url, getattr(config, "warmup_connections", False))
+        self._rate_limiter = get_rate_limiter(
+            "deepseek", config.requests_per_minute, config.max_concurrency
+        )
+        self._key_pool = self._build_key_pool("deepseek", config)
+        self._compress_requests = getattr(config, "compress_requests", False)
+        self._breaker = get_circuit_breaker("deepseek", self.base_url)
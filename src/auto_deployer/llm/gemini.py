@@ -2,20 +2,25 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import time
-from typing import TYPE_CHECKING, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterator, Optional
 
 import requests
 
+from ._http import DEFAULT_PROXY, encode_body, get_session, iter_sse_data, loads, log_error_response
+from .base import BaseLLMProvider, cached, coalesce_inflight
+from .circuit_breaker import get_circuit_breaker
+from .rate_limiter import get_rate_limiter, retry_delay
+
 if TYPE_CHECKING:
     from ..config import LLMConfig
 
 logger = logging.getLogger(__name__)
 
 
-class GeminiProvider:
+class GeminiProvider(BaseLLMProvider):
     """Google Gemini LLM provider using official API."""
 
     def __init__(self, config: "LLMConfig"):
@@ -29,13 +34,10 @@ class GeminiProvider:
             raise ValueError("Gemini API key is required")
 
         self.config = config
-        self.session = requests.Session()
 
         # Set up proxy if configured
-        import os
-        proxy = config.proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+        proxy = config.proxy or DEFAULT_PROXY
         if proxy:
-            self.session.proxies = {"http": proxy, "https": proxy}
             logger.info("Gemini provider using proxy: %s", proxy)
 
         # Gemini API endpoint
@@ -49,6 +51,52 @@ class GeminiProvider:
         else:
             self.base_endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
 
+        # Static request scaffolding, built once instead of on every call
+        self._url = f"{self.base_endpoint}?key={self.api_key}"
+        self._headers = MappingProxyType({"Content-Type": "application/json"})
+        # Custom endpoints that are not a :generateContent URL cannot stream
+        if ":generateContent" in self.base_endpoint:
+            stream_endpoint = self.base_endpoint.replace(":generateContent", ":streamGenerateContent")
+            self._stream_url: Optional[str] = f"{stream_endpoint}?alt=sse&key={self.api_key}"
+        else:
+            self._stream_url = None
+
+        # Pooled session shared with other providers talking to the same host
+        self.session = get_session(proxy, self.base_endpoint, getattr(config, "warmup_connections", False))
+        self._rate_limiter = get_rate_limiter(
+            "gemini", config.requests_per_minute, config.max_concurrency
+        )
+        self._compress_requests = getattr(config, "compress_requests", False)
+        self._breaker = get_circuit_breaker("gemini", self.base_endpoint)
+
+    def _build_body(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        response_format: str,
+    ) -> dict:
+        """Build a generateContent request body."""
+        # Combine system prompt and user prompt for Gemini
+        combined_prompt = prompt
+        if system_prompt:
+            combined_prompt = f"{system_prompt}\n\n---\n\n{prompt}"
+
+        # Build request body
+        body = {
+            "contents": [{"role": "user", "parts": [{"text": combined_prompt}]}],
+            "generationConfig": {
+                "temperature": self.temperature,
+            },
+        }
+
+        # Add JSON response format if requested
+        if response_format == "json":
+            body["generationConfig"]["responseMimeType"] = "application/json"
+
+        return body
+
+    @cached
+    @coalesce_inflight
     def generate_response(
         self,
         prompt: str,
@@ -70,43 +118,47 @@ class GeminiProvider:
         Returns:
             Generated text or None on failure
         """
-        url = f"{self.base_endpoint}?key={self.api_key}"
+        body = self._build_body(prompt, system_prompt, response_format)
 
-        # Combine system prompt and user prompt for Gemini
-        combined_prompt = prompt
-        if system_prompt:
-            combined_prompt = f"{system_prompt}\n\n---\n\n{prompt}"
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("Gemini circuit open, skipping API call")
+            return None
 
-        # Build request body
-        body = {
-            "contents": [{"role": "user", "parts": [{"text": combined_prompt}]}],
-            "generationConfig": {
-                "temperature": self.temperature,
-            },
-        }
-
-        # Add JSON response format if requested
-        if response_format == "json":
-            body["generationConfig"]["responseMimeType"] = "application/json"
+        payload, extra_headers = encode_body(body, self._compress_requests)
 
         # Retry loop for rate limiting
         for attempt in range(max_retries):
             try:
-                response = self.session.post(
-                    url,
-                    json=body,
-                    timeout=timeout
-                )
+                with self._rate_limiter:
+                    response = self.session.post(
+                        self._url,
+                        data=payload,
+                        headers={**self._headers, **extra_headers} if extra_headers else self._headers,
+                        timeout=timeout
+                    )
 
                 # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited by Gemini. Waiting {wait_time}s before retry...")
+                status = response.status_code
+                if status == 429:
+                    self._breaker.record_failure()
+                    wait_time = retry_delay(response, attempt)
+                    logger.warning(f"Rate limited by Gemini. Waiting {wait_time:.1f}s before retry...")
                     time.sleep(wait_time)
                     continue
 
-                response.raise_for_status()
-                data = response.json()
+                if status >= 400:
+                    # A 4xx means the provider is up but rejected this request
+                    if status >= 500:
+                        self._breaker.record_failure()
+                    else:
+                        self._breaker.record_success()
+                    logger.error("Gemini API call failed with HTTP %s", status)
+                    log_error_response(response)
+                    return None
+
+                self._breaker.record_success()
+                data = loads(response.content)
 
                 # Extract response text
                 candidates = data.get("candidates") or []
@@ -124,23 +176,91 @@ class GeminiProvider:
                 logger.error("No text found in Gemini response")
                 return None
 
-            except requests.exceptions.HTTPError as e:
-                if response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-                logger.error(f"Gemini API call failed: {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_data = e.response.json()
-                        logger.error(f"Error details: {error_data}")
-                    except:
-                        logger.error(f"Response text: {e.response.text[:500]}")
+            except requests.exceptions.RequestException as exc:
+                # Timeouts and connection errors
+                self._breaker.record_failure()
+                logger.error("Gemini API call failed: %s", exc)
                 return None
             except Exception as exc:
-                logger.error(f"Gemini API call failed: {exc}")
+                logger.error("Gemini API call failed: %s", exc, exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
                 return None
 
+        # Also reached with max_retries=0, when no outcome was recorded
+        self._breaker.release()
         logger.error("Rate limited after max retries")
         return None
+
+    def stream_response(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: str = "json",
+        timeout: int = 60,
+    ) -> Iterator[str]:
+        """
+        Stream response text chunks using streamGenerateContent (SSE).
+
+        Custom endpoints that are not a ``:generateContent`` URL fall back to
+        a single non-streaming call.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            response_format: "json" or "text"
+            timeout: Request timeout in seconds
+
+        Yields:
+            Text chunks (nothing on failure)
+        """
+        if self._stream_url is None:
+            yield from super().stream_response(prompt, system_prompt, response_format, timeout)
+            return
+
+        # Fail fast while the provider is known to be down
+        if not self._breaker.allow_request():
+            logger.warning("Gemini circuit open, skipping streaming call")
+            return
+
+        body = self._build_body(prompt, system_prompt, response_format)
+        payload, extra_headers = encode_body(body, self._compress_requests)
+
+        with self._rate_limiter:
+            try:
+                response = self.session.post(
+                    self._stream_url,
+                    data=payload,
+                    headers={**self._headers, **extra_headers} if extra_headers else self._headers,
+                    timeout=timeout,
+                    stream=True,
+                )
+                with response:
+                    status = response.status_code
+                    if status == 429:
+                        self._breaker.record_failure()
+                        logger.warning("Rate limited by Gemini, skipping streaming call")
+                        return
+                    if status >= 400:
+                        # A 4xx means the provider is up but rejected this request
+                        if status >= 500:
+                            self._breaker.record_failure()
+                        else:
+                            self._breaker.record_success()
+                        logger.error(f"Gemini streaming call failed with HTTP {status}: {response.text[:500]}")
+                        return
+                    self._breaker.record_success()
+                    for event in iter_sse_data(response):
+                        for candidate in event.get("candidates") or []:
+                            for part in candidate.get("content", {}).get("parts", []):
+                                text = part.get("text")
+                                if text:
+                                    yield text
+            except requests.exceptions.RequestException as exc:
+                # Timeouts, connection errors and streams cut off midway
+                self._breaker.record_failure()
+                logger.error(f"Gemini streaming call failed: {exc}")
+            except Exception as exc:
+                logger.error(f"Gemini streaming call failed: {exc}", exc_info=True)
+                # Not a provider outage; let a half-open circuit send another trial
+                self._breaker.release()
@@ -6,15 +6,45 @@ to reduce token usage while preserving critical information.
 
 from __future__ import annotations
 
+import io
 import logging
-from typing import List, TYPE_CHECKING
+import re
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from ._http import loads
 
 if TYPE_CHECKING:
     from .base import BaseLLMProvider
+    from .cache import SemanticCache
     from ..orchestrator.models import CommandRecord
 
 logger = logging.getLogger(__name__)
 
+# Terminal control sequences (colors, cursor movement) in captured output
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+# Lines kept from each end of long outputs before truncation
+DISTILL_KEEP_LINES = 5
+
+# Histories at or below these sizes are summarized by rules, not the LLM
+TRIVIAL_HISTORY_MAX_CHARS = 512
+TRIVIAL_HISTORY_MAX_COMMANDS = 2
+
+# Larger histories are compressed in chunks whose summaries are then merged,
+# keeping every call well inside the context window
+COMPRESSION_CHUNK_COMMANDS = 40
+COMPRESSION_MAX_PROMPT_CHARS = 32_000
+
+# Prompt pieces, formatted once per step / command
+_STEP_HEADER_TEMPLATE = "Step: {step_name}\nGoal: {step_goal}\n\nCommands to compress:\n"
+_COMMAND_TEMPLATE = "\nCommand {index}:\n  Command: {command}\n  Status: {status}\n  Output: {stdout}\n  Error: {stderr}\n"
+_PROMPT_TAIL = "\n\nProvide the compressed history in plain text format (do not use markdown code blocks):"
+_MERGE_PROMPT_TEMPLATE = (
+    "Step: {step_name}\nGoal: {step_goal}\n\n"
+    "The command history of this step was compressed in {count} consecutive parts:\n\n{summaries}\n\n"
+    "Merge them into one compressed history in the same format, keeping the chronological order "
+    "(do not use markdown code blocks):"
+)
+
 COMPRESSION_SYSTEM_PROMPT = """You are a command execution history compressor for deployment automation.
 
 Your task: Compress a list of shell command executions into a concise, factual summary.
@@ -59,18 +89,51 @@ Install Failed:
 
 Compress the following command history:"""
 
+BATCH_COMPRESSION_INSTRUCTIONS = """Each group above is the history of one deployment step, delimited by <<<GROUP id>>> and <<<END GROUP id>>>.
+Compress every group independently using the rules above.
+
+Respond with JSON only:
+{"summaries": [{"id": <group id>, "text": "<compressed history in plain text>"}]}"""
+
+
+def _distill_output(text: str, keep_lines: int = DISTILL_KEEP_LINES) -> str:
+    """
+    Drop output noise so the truncated prompt excerpt stays informative.
+    
+    Strips ANSI escapes, keeps only the final state of ``\\r``-redrawn
+    progress lines, collapses consecutive duplicate lines and keeps the
+    first and last ``keep_lines`` lines of long outputs.
+    """
+    text = _ANSI_ESCAPE.sub("", text)
+    lines: List[str] = []
+    for line in text.split("\n"):
+        line = line.rstrip("\r").rsplit("\r", 1)[-1].rstrip()
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    
+    if len(lines) > 2 * keep_lines:
+        omitted = len(lines) - 2 * keep_lines
+        lines = lines[:keep_lines] + [f"... ({omitted} lines omitted)"] + lines[-keep_lines:]
+    return "\n".join(lines)
+
 
 class HistoryCompressor:
     """Compresses command execution history using LLM."""
     
-    def __init__(self, llm_provider: "BaseLLMProvider"):
+    def __init__(
+        self,
+        llm_provider: "BaseLLMProvider",
+        semantic_cache: Optional["SemanticCache"] = None,
+    ):
         """
         Initialize history compressor.
         
         Args:
             llm_provider: LLM provider instance to use for compression
+            semantic_cache: Optional cache reusing summaries of near-identical command lists
         """
         self.llm_provider = llm_provider
+        self.semantic_cache = semantic_cache
         logger.debug("HistoryCompressor initialized")
     
     def compress(
@@ -92,12 +155,30 @@ class HistoryCompressor:
         """
         if not commands:
             return "(no commands to compress)"
+        if self._is_trivial(commands):
+            logger.debug(f"Skipping LLM compression for trivial history of step: {step_name}")
+            return self._fallback_compression(commands)
         
         logger.info(f"Compressing {len(commands)} commands for step: {step_name}")
         
+        cache_key = self._cache_key(commands, step_goal)
+        if cache_key is not None:
+            cached = self.semantic_cache.get(*cache_key)
+            if cached is not None:
+                logger.info(f"Reusing cached summary for {len(commands)} similar commands")
+                return cached
+        
         # Build compression prompt
         prompt = self._build_compression_prompt(commands, step_name, step_goal)
         
+        if len(commands) > 1 and (
+            len(commands) > COMPRESSION_CHUNK_COMMANDS or len(prompt) > COMPRESSION_MAX_PROMPT_CHARS
+        ):
+            compressed_text = self._compress_chunked(commands, step_name, step_goal)
+            if cache_key is not None:
+                self.semantic_cache.put(*cache_key, compressed_text)
+            return compressed_text
+        
         try:
             # Call LLM for compression
             compressed_text = self.llm_provider.generate_response(
@@ -113,12 +194,179 @@ class HistoryCompressor:
                 return self._fallback_compression(commands)
             
             logger.info(f"Compression successful: {len(commands)} commands → {len(compressed_text)} chars")
-            return compressed_text.strip()
+            compressed_text = compressed_text.strip()
+            if cache_key is not None:
+                self.semantic_cache.put(*cache_key, compressed_text)
+            return compressed_text
             
         except Exception as e:
             logger.error(f"Compression failed: {e}, using fallback")
             return self._fallback_compression(commands)
     
+    def _compress_chunked(
+        self,
+        commands: List["CommandRecord"],
+        step_name: str,
+        step_goal: str,
+    ) -> str:
+        """Compress an oversized history chunk by chunk, then merge the summaries."""
+        if len(commands) > COMPRESSION_CHUNK_COMMANDS:
+            size = COMPRESSION_CHUNK_COMMANDS
+        else:
+            size = (len(commands) + 1) // 2  # Few commands with huge outputs
+        chunks = [commands[i:i + size] for i in range(0, len(commands), size)]
+        logger.info(f"Compressing {len(commands)} commands for step {step_name} in {len(chunks)} chunks")
+        
+        # Chunks that are still too large are split again by compress()
+        partials = [
+            self.compress(chunk, f"{step_name} (part {n}/{len(chunks)})", step_goal)
+            for n, chunk in enumerate(chunks, 1)
+        ]
+        prompt = _MERGE_PROMPT_TEMPLATE.format(
+            step_name=step_name,
+            step_goal=step_goal,
+            count=len(partials),
+            summaries="\n\n".join(f"Part {n}:\n{text}" for n, text in enumerate(partials, 1)),
+        )
+        
+        try:
+            merged = self.llm_provider.generate_response(
+                prompt=prompt,
+                system_prompt=COMPRESSION_SYSTEM_PROMPT,
+                response_format="text",
+                timeout=30,
+                max_retries=2,
+            )
+        except Exception as e:
+            logger.error(f"Merging chunk summaries failed: {e}")
+            merged = None
+        
+        if not merged:
+            return "\n\n".join(partials)
+        return merged.strip()
+    
+    def compress_stream(
+        self,
+        commands: List["CommandRecord"],
+        step_name: str,
+        step_goal: str,
+    ) -> Iterator[str]:
+        """
+        Stream the compressed history in chunks as the LLM generates it.
+        
+        Lets callers display or forward the summary while it is still being
+        decoded. Joining the chunks gives the same text as ``compress``.
+        
+        Args:
+            commands: List of CommandRecord objects to compress
+            step_name: Name of the step (for context)
+            step_goal: Goal of the step (for context)
+            
+        Yields:
+            Text chunks of the compressed history
+        """
+        if not commands:
+            yield "(no commands to compress)"
+            return
+        if self._is_trivial(commands):
+            yield self._fallback_compression(commands)
+            return
+        
+        cache_key = self._cache_key(commands, step_goal)
+        if cache_key is not None:
+            cached = self.semantic_cache.get(*cache_key)
+            if cached is not None:
+                logger.info(f"Reusing cached summary for {len(commands)} similar commands")
+                yield cached
+                return
+        
+        prompt = self._build_compression_prompt(commands, step_name, step_goal)
+        buf = io.StringIO()
+        try:
+            for chunk in self.llm_provider.stream_response(
+                prompt=prompt,
+                system_prompt=COMPRESSION_SYSTEM_PROMPT,
+                response_format="text",
+                timeout=30,
+            ):
+                if not buf.tell():
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                buf.write(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Streaming compression failed: {e}")
+        
+        if not buf.tell():
+            logger.error("LLM returned empty response for compression, using fallback")
+            yield self._fallback_compression(commands)
+            return
+        
+        compressed_text = buf.getvalue().strip()
+        logger.info(f"Compression successful: {len(commands)} commands → {len(compressed_text)} chars")
+        if cache_key is not None:
+            self.semantic_cache.put(*cache_key, compressed_text)
+    
+    def compress_batch(
+        self,
+        groups: List[Tuple[str, str, List["CommandRecord"]]],
+    ) -> List[str]:
+        """
+        Compress the histories of several steps with a single LLM call.
+        
+        Groups missing from (or malformed in) the batched response are
+        compressed individually with ``compress``.
+        
+        Args:
+            groups: List of (step_name, step_goal, commands) tuples
+            
+        Returns:
+            Compressed history per group, aligned with ``groups``
+        """
+        results = ["(no commands to compress)"] * len(groups)
+        pending = []
+        for i, (_, _, commands) in enumerate(groups):
+            if not commands:
+                continue
+            if self._is_trivial(commands):
+                results[i] = self._fallback_compression(commands)
+            elif len(commands) > COMPRESSION_CHUNK_COMMANDS:
+                # Too large to share a prompt with other steps
+                step_name, step_goal, _ = groups[i]
+                results[i] = self.compress(commands, step_name, step_goal)
+            else:
+                pending.append(i)
+        if len(pending) <= 1:
+            for i in pending:
+                step_name, step_goal, commands = groups[i]
+                results[i] = self.compress(commands, step_name, step_goal)
+            return results
+        
+        logger.info(f"Compressing {len(pending)} step histories in one batch")
+        summaries: Dict[int, str] = {}
+        try:
+            response = self.llm_provider.generate_response(
+                prompt=self._build_batch_prompt(groups, pending),
+                system_prompt=COMPRESSION_SYSTEM_PROMPT,
+                response_format="json",
+                timeout=60,
+                max_retries=2,
+            )
+            if response:
+                summaries = self._parse_batch_response(response)
+        except Exception as e:
+            logger.error(f"Batch compression failed: {e}")
+        
+        for i in pending:
+            if i in summaries:
+                results[i] = summaries[i]
+            else:
+                step_name, step_goal, commands = groups[i]
+                logger.warning(f"No batched summary for step {step_name}, compressing individually")
+                results[i] = self.compress(commands, step_name, step_goal)
+        return results
+    
     def _build_compression_prompt(
         self,
         commands: List["CommandRecord"],
@@ -126,30 +374,99 @@ class HistoryCompressor:
         step_goal: str,
     ) -> str:
         """Build the compression prompt from command records."""
-        command_list = []
-        
+        # Single pass into one buffer: no per-command f-strings kept in a list
+        buf = io.StringIO()
+        buf.write(_STEP_HEADER_TEMPLATE.format(step_name=step_name, step_goal=step_goal))
+        self._write_commands(buf, commands)
+        buf.write(_PROMPT_TAIL)
+        return buf.getvalue()
+    
+    def _build_batch_prompt(
+        self,
+        groups: List[Tuple[str, str, List["CommandRecord"]]],
+        indices: List[int],
+    ) -> str:
+        """Build one prompt containing the command groups at ``indices``."""
+        buf = io.StringIO()
+        for i in indices:
+            step_name, step_goal, commands = groups[i]
+            buf.write(f"<<<GROUP {i}>>>\n")
+            buf.write(_STEP_HEADER_TEMPLATE.format(step_name=step_name, step_goal=step_goal))
+            self._write_commands(buf, commands)
+            buf.write(f"<<<END GROUP {i}>>>\n\n")
+        buf.write(BATCH_COMPRESSION_INSTRUCTIONS)
+        return buf.getvalue()
+    
+    @staticmethod
+    def _is_trivial(commands: List["CommandRecord"]) -> bool:
+        """Whether the rule-based summary loses nothing worth an LLM call."""
+        if all(cmd.success and not (cmd.stdout or "").strip() for cmd in commands):
+            return True
+        if len(commands) <= TRIVIAL_HISTORY_MAX_COMMANDS and all(cmd.success for cmd in commands):
+            return True
+        size = sum(len(cmd.command) + len(cmd.stdout or "") + len(cmd.stderr or "") for cmd in commands)
+        return size < TRIVIAL_HISTORY_MAX_CHARS
+    
+    def _cache_key(
+        self, commands: List["CommandRecord"], step_goal: str
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Return the (namespace, text) semantic cache key for a command list.
+
+        Histories with failed commands are not cached: their summaries carry
+        error messages, ports and versions that the command text alone (and
+        the normalized embedding) cannot tell apart.
+        """
+        if self.semantic_cache is None or not all(cmd.success for cmd in commands):
+            return None
+        provider = self.llm_provider
+        namespace = "compress:{}:{}:{}".format(
+            type(provider).__name__, getattr(provider, "model", None), step_goal
+        )
+        return namespace, "\n".join(cmd.command for cmd in commands)
+    
+    @staticmethod
+    def _write_commands(buf: io.StringIO, commands: List["CommandRecord"]) -> None:
+        """Write the command records of one step into ``buf``."""
         for i, cmd in enumerate(commands, 1):
             status = "Success" if cmd.success else f"FAILED (exit {cmd.exit_code})"
             
+            stdout = _distill_output(cmd.stdout) if cmd.stdout else ""
+            stderr = _distill_output(cmd.stderr) if cmd.stderr else ""
             # Truncate outputs for compression prompt (LLM doesn't need full details)
-            stdout_preview = cmd.stdout[:500] if cmd.stdout else "(no output)"
-            stderr_preview = cmd.stderr[:300] if cmd.stderr else "(no errors)"
-            
-            command_list.append(f"""
-Command {i}:
-  Command: {cmd.command}
-  Status: {status}
-  Output: {stdout_preview}
-  Error: {stderr_preview}
-""")
+            buf.write(_COMMAND_TEMPLATE.format(
+                index=i,
+                command=cmd.command,
+                status=status,
+                stdout=stdout[:500] if stdout else "(no output)",
+                stderr=stderr[:300] if stderr else "(no errors)",
+            ))
+    
+    @staticmethod
+    def _parse_batch_response(response: str) -> Dict[int, str]:
+        """Map group id -> summary text; malformed entries are skipped."""
+        start, end = response.find("{"), response.rfind("}") + 1
+        if start == -1 or end == 0:
+            return {}
+        try:
+            data = loads(response[start:end])
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
         
-        return f"""Step: {step_name}
-Goal: {step_goal}
-
-Commands to compress:
-{''.join(command_list)}
-
-Provide the compressed history in plain text format (do not use markdown code blocks):"""
+        summaries = {}
+        for item in data.get("summaries") or []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                group_id = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            text = item.get("text")
+            if isinstance(text, str) and text.strip():
+                summaries[group_id] = text.strip()
+        return summaries
     
     def _fallback_compression(self, commands: List["CommandRecord"]) -> str:
         """
@@ -165,7 +482,7 @@ Provide the compressed history in plain text format (do not use markdown code bl
                 lines.append(f"{i}. {cmd.command} → Success")
                 # Include first line of output if informative
                 if cmd.stdout:
-                    first_line = cmd.stdout.split('\n')[0][:100]
+                    first_line = cmd.stdout.partition('\n')[0][:100]
                     if first_line and not first_line.isspace():
                         lines.append(f"   Output: {first_line}")
             else:
@@ -173,7 +490,7 @@ Provide the compressed history in plain text format (do not use markdown code bl
                 lines.append(f"{i}. {cmd.command} → FAILED (exit {cmd.exit_code})")
                 if cmd.stderr:
                     # Show first error line
-                    first_error = cmd.stderr.split('\n')[0][:200]
+                    first_error = cmd.stderr.partition('\n')[0][:200]
                     lines.append(f"   Error: {first_error}")
         
         return "\n".join(lines)
@@ -0,0 +1,76 @@
+"""Round-robin pool of API keys for one provider endpoint.
+
+A single key caps throughput at its tier's RPM. With several keys configured
+(``LLMConfig.api_keys``), calls rotate across them, each with its own rate
+limiter, and a key that gets a 429 is skipped until its ``Retry-After`` has
+passed instead of stalling the caller.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Mapping, Sequence
+
+from .rate_limiter import LLMRateLimiter
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short, non-reversible id for an API key (registry keys and logs)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class ApiKeySlot:
+    """Request headers and rate limiter of one API key."""
+
+    headers: Mapping[str, str]
+    rate_limiter: LLMRateLimiter
+    # time.monotonic() until which the key is rate limited
+    cooling_until: float = 0.0
+
+
+class KeyPool:
+    """Thread-safe round-robin over API key slots that skips cooling keys."""
+
+    def __init__(self, slots: Sequence[ApiKeySlot]):
+        """
+        Initialize key pool.
+
+        Args:
+            slots: One slot per API key (at least one)
+        """
+        if not slots:
+            raise ValueError("KeyPool needs at least one API key")
+        self._slots: List[ApiKeySlot] = list(slots)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def acquire(self) -> ApiKeySlot:
+        """Return the next key that is not cooling down (or the one ready soonest)."""
+        now = time.monotonic()
+        with self._lock:
+            count = len(self._slots)
+            for offset in range(count):
+                slot = self._slots[(self._next + offset) % count]
+                if slot.cooling_until <= now:
+                    self._next = (self._next + offset + 1) % count
+                    return slot
+            return min(self._slots, key=lambda s: s.cooling_until)
+
+    def cool_down(self, slot: ApiKeySlot, seconds: float) -> bool:
+        """
+        Mark a key as rate limited for ``seconds``.
+
+        Returns:
+            True if another key can be used right away
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot.cooling_until = now + seconds
+            return any(s.cooling_until <= now for s in self._slots)
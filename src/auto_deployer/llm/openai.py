@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
-import json
 import logging
-import time
-from typing import TYPE_CHECKING, Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-import requests
+from ._chat import ChatCompletionsProvider
+from ._http import DEFAULT_PROXY, dumps, get_session, loads
+from .base import BATCH_POLL_TIMEOUT, poll_batch
+from .circuit_breaker import get_circuit_breaker
+from .rate_limiter import get_rate_limiter
 
 if TYPE_CHECKING:
     from ..config import LLMConfig
@@ -15,9 +18,11 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-class OpenAIProvider:
+class OpenAIProvider(ChatCompletionsProvider):
     """OpenAI LLM provider using official API."""
 
+    display_name = "OpenAI"
+
     def __init__(self, config: "LLMConfig"):
         """
         Initialize OpenAI provider.
@@ -29,13 +34,10 @@ class OpenAIProvider:
             raise ValueError("OpenAI API key is required")
 
         self.config = config
-        self.session = requests.Session()
 
         # Set up proxy if configured
-        import os
-        proxy = config.proxy or os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
+        proxy = config.proxy or DEFAULT_PROXY
         if proxy:
-            self.session.proxies = {"http": proxy, "https": proxy}
             logger.info("OpenAI provider using proxy: %s", proxy)
 
         # OpenAI API endpoint
@@ -44,103 +46,123 @@ class OpenAIProvider:
         self.model = config.model or "gpt-4o"
         self.temperature = config.temperature
 
-    def generate_response(
+        # Static request scaffolding, built once instead of on every call
+        self._url = f"{self.base_url}/chat/completions"
+        # Batch file uploads are multipart, so they only carry the auth header
+        self._auth_headers = MappingProxyType({"Authorization": f"Bearer {self.api_key}"})
+        self._headers = MappingProxyType({**self._auth_headers, "Content-Type": "application/json"})
+        self._body_base = {"model": self.model, "temperature": self.temperature}
+
+        # Pooled session shared with other providers talking to the same host
+        self.session = get_session(proxy, self.base_url, getattr(config, "warmup_connections", False))
+        self._rate_limiter = get_rate_limiter(
+            "openai", config.requests_per_minute, config.max_concurrency
+        )
+        self._key_pool = self._build_key_pool("openai", config)
+        self._compress_requests = getattr(config, "compress_requests", False)
+        self._breaker = get_circuit_breaker("openai", self.base_url)
+
+    def batch_generate(
         self,
-        prompt: str,
-        system_prompt: Optional[str] = None,
+        prompts: List[Tuple[str, Optional[str]]],
         response_format: str = "json",
         timeout: int = 60,
-        max_retries: int = 3,
-    ) -> Optional[str]:
+        poll_timeout: int = BATCH_POLL_TIMEOUT,
+    ) -> List[Optional[str]]:
         """
-        Generate a response from OpenAI.
+        Generate responses via the OpenAI Batch API (half price, async).
+
+        Only suitable for non-latency-critical work: batches can take minutes.
+        Falls back to per-prompt requests if the batch cannot be submitted.
 
         Args:
-            prompt: User prompt
-            system_prompt: Optional system prompt
+            prompts: List of (prompt, system_prompt) tuples
             response_format: "json" or "text"
-            timeout: Request timeout in seconds
-            max_retries: Maximum number of retries on rate limit
+            timeout: Timeout for each HTTP request in seconds
+            poll_timeout: Maximum time to wait for the batch to finish
 
         Returns:
-            Generated text or None on failure
+            Responses aligned with ``prompts`` (None for failed items)
         """
-        url = f"{self.base_url}/chat/completions"
-
-        # Build messages
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        # Build request body
-        body = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": self.temperature,
-        }
-
-        # Add response format if JSON is requested
-        if response_format == "json":
-            body["response_format"] = {"type": "json_object"}
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
-        # Retry loop for rate limiting
-        for attempt in range(max_retries):
-            try:
-                response = self.session.post(
-                    url,
-                    json=body,
-                    headers=headers,
-                    timeout=timeout
-                )
-
-                # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited by OpenAI. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-
-                response.raise_for_status()
-                data = response.json()
-
-                # Extract response content
-                choices = data.get("choices", [])
-                if not choices:
-                    logger.error("No choices in OpenAI response")
-                    return None
-
-                message = choices[0].get("message", {})
-                content = message.get("content")
-
-                if not content:
-                    logger.error("No content in OpenAI response")
-                    return None
-
-                return content
-
-            except requests.exceptions.HTTPError as e:
-                if response.status_code == 429 and attempt < max_retries - 1:
-                    wait_time = 30 * (attempt + 1)
-                    logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
-                    continue
-                logger.error(f"OpenAI API call failed: {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_data = e.response.json()
-                        logger.error(f"Error details: {error_data}")
-                    except:
-                        logger.error(f"Response text: {e.response.text[:500]}")
-                return None
-            except Exception as exc:
-                logger.error(f"OpenAI API call failed: {exc}")
-                return None
-
-        logger.error("Rate limited after max retries")
-        return None
+        if not prompts:
+            return []
+
+        auth = self._auth_headers
+        lines = [
+            dumps({
+                "custom_id": f"req-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_body(prompt, system_prompt, response_format),
+            })
+            for i, (prompt, system_prompt) in enumerate(prompts)
+        ]
+
+        try:
+            upload = self.session.post(
+                f"{self.base_url}/files",
+                headers=auth,
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", b"\n".join(lines))},
+                timeout=timeout,
+            )
+            upload.raise_for_status()
+            response = self.session.post(
+                f"{self.base_url}/batches",
+                headers=self._headers,
+                data=dumps({
+                    "input_file_id": loads(upload.content)["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h",
+                }),
+                timeout=timeout,
+            )
+            response.raise_for_status()
+            batch_id = loads(response.content)["id"]
+        except Exception as exc:
+            logger.warning(f"OpenAI batch submission failed ({exc}), sending prompts individually")
+            return super().batch_generate(prompts, response_format=response_format, timeout=timeout)
+
+        logger.info(f"Submitted OpenAI batch {batch_id} ({len(prompts)} prompts)")
+
+        def _fetch() -> dict:
+            status_response = self.session.get(
+                f"{self.base_url}/batches/{batch_id}", headers=auth, timeout=timeout
+            )
+            status_response.raise_for_status()
+            return loads(status_response.content)
+
+        finished = {"completed", "failed", "expired", "cancelled"}
+        results: List[Optional[str]] = [None] * len(prompts)
+        try:
+            batch = poll_batch(_fetch, lambda b: b.get("status") in finished, poll_timeout)
+            if batch is None or not batch.get("output_file_id"):
+                if batch is not None:
+                    logger.error(f"OpenAI batch {batch_id} ended with status {batch.get('status')}")
+                return results
+
+            output = self.session.get(
+                f"{self.base_url}/files/{batch['output_file_id']}/content",
+                headers=auth,
+                timeout=timeout,
+            )
+            output.raise_for_status()
+        except Exception as exc:
+            logger.error(f"OpenAI batch {batch_id} failed: {exc}")
+            return results
+
+        # Output is JSONL and not guaranteed to be in submission order
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = loads(line)
+            index = int(item["custom_id"].split("-", 1)[1])
+            item_response = item.get("response") or {}
+            if item.get("error") or item_response.get("status_code") != 200:
+                logger.error(f"Batch item {item['custom_id']} failed: {item.get('error')}")
+                continue
+            choices = item_response.get("body", {}).get("choices", [])
+            if choices:
+                results[index] = choices[0].get("message", {}).get("content")
+
+        return results
@@ -3,11 +3,50 @@
 根据命令执行结果，提取关键信息而非简单截断
 """
 
+import io
 import re
-from typing import Dict, List, Optional
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    import re2
+except ImportError:  # 可选加速（线性时间 DFA），见 "speedups" extra
+    re2 = None
+
+# UTF-8 中非续字节（ASCII 与多字节序列首字节），每个对应一个字符
+_UTF8_LEAD_BYTES = bytes(b for b in range(256) if not 0x80 <= b < 0xC0)
+
+
+def _union(patterns: List["re.Pattern"]) -> "re.Pattern":
+    """把多个模式合并为一个分支正则，一次扫描代替逐个匹配"""
+    source = "|".join(f"(?:{p.pattern})" for p in patterns)
+    if re2 is not None:
+        try:
+            return re2.compile(source)
+        except re2.error:
+            pass  # RE2 不支持的语法，退回标准 re
+    return re.compile(source)
+
+
+def _named_union(
+    patterns: Dict[str, "re.Pattern"], flags: int = 0
+) -> Tuple["re.Pattern", Dict[str, Optional[int]]]:
+    """
+    把具名模式合并为一个分支正则，匹配的类型由 lastgroup 给出
+
+    Returns:
+        (合并后的正则, 类型 -> 该类型内部第一个捕获组的编号，无内部分组为 None)
+    """
+    union = re.compile("|".join(f"(?P<{name}>{p.pattern})" for name, p in patterns.items()), flags)
+    inner_groups = {
+        name: union.groupindex[name] + 1 if p.groups else None for name, p in patterns.items()
+    }
+    return union, inner_groups
+
 
 class CommandType(Enum):
     """命令类型分类"""
@@ -17,7 +56,7 @@ class CommandType(Enum):
     DIRECTORY = "directory"  # 目录列表型:需要提取文件/目录名(ls, dir, Get-ChildItem)
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedOutput:
     """提取后的输出"""
     summary: str  # 一句话总结
@@ -30,8 +69,12 @@ class ExtractedOutput:
 class CommandOutputExtractor:
     """命令输出智能提取器"""
 
-    # 命令分类规则
-    NOISE_COMMANDS = [
+    # 模式和常量都是类属性，实例只保存两个上限配置
+    __slots__ = ('max_success_lines', 'max_error_lines')
+
+    # 所有模式在类加载时预编译，避免每次调用都查 re 模块的编译缓存
+    # 命令分类规则（命令转为小写后匹配）
+    NOISE_COMMANDS = [re.compile(p) for p in (
         # 包管理器安装命令
         r'^npm\s+install', r'^npm\s+i\s', r'^yarn\s+install', r'^yarn\s+add',
         r'^pip\s+install', r'^pip3\s+install',
@@ -42,9 +85,9 @@ class CommandOutputExtractor:
         # 构建命令(输出冗长)
         r'^npm\s+run\s+build', r'^yarn\s+build', r'^mvn\s+package',
         r'^gradle\s+build', r'^make\s+',
-    ]
+    )]
 
-    INFO_COMMANDS = [
+    INFO_COMMANDS = [re.compile(p) for p in (
         # 文件/目录查看
         r'^ls\s', r'^ls$', r'^dir\s', r'^dir$',
         r'^cat\s', r'^type\s',  # type是Windows的cat
@@ -63,33 +106,37 @@ class CommandOutputExtractor:
         r'^find\s', r'^grep\s', r'^rg\s',
         # 内容读取
         r'^Get-Content\s',  # PowerShell
-    ]
+    )]
 
     # 目录列表命令（需要提取文件/目录名）
     # 注意：命令会被转为小写后匹配，所以模式也要小写
-    DIRECTORY_COMMANDS = [
+    DIRECTORY_COMMANDS = [re.compile(p) for p in (
         # PowerShell (小写匹配)
         r'^get-childitem\s', r'^get-childitem$', r'^gci\s', r'^gci$',
         # Windows CMD
         r'^dir\s', r'^dir$',
         # Linux/macOS
         r'^ls\s', r'^ls$', r'^ls\s+-[alh]+',
-    ]
+    )]
 
     # 关键信息模式（成功时提取）
-    KEY_PATTERNS = {
+    KEY_PATTERNS = {k: re.compile(v, re.IGNORECASE) for k, v in {
         'port': r'(?:port|端口)[:：\s]+(\d+)',
         'pid': r'(?:pid|process id|进程ID)[:：\s]+(\d+)',
         'url': r'https?://[^\s]+',
         'ip': r'\b\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\b',
         # Unix路径必须以字母/下划线开头，避免匹配日期如 /12/12
-        'path': r'/(?:[a-zA-Z_][\w\-\.]*/?)+|[A-Z]:[/\\][\w\-\\/.]+',
+        # 每段以 / 分隔，拆分方式唯一，避免嵌套量词的回溯
+        'path': r'/[a-zA-Z_][\w.-]*(?:/[a-zA-Z_][\w.-]*)*/?|[A-Z]:[/\\][\w\\/.-]+',
         'version': r'v?\d+\.\d+\.\d+',
         'status': r'(?:status|状态)[:：\s]+(running|stopped|active|inactive|启动|停止)',
-    }
+    }.items()}
+
+    # 所有关键信息模式合并为一个具名分支正则，一次扫描输出
+    _KEY_PATTERNS_RE, _KEY_INNER_GROUPS = _named_union(KEY_PATTERNS, re.IGNORECASE)
 
     # 错误模式（失败时提取）
-    ERROR_PATTERNS = {
+    ERROR_PATTERNS = {k: re.compile(v) for k, v in {
         'error_line': r'(?i)error[:：\s].*',
         'exception': r'(?i)(?:exception|traceback).*',
         'failed': r'(?i)failed[:：\s].*',
@@ -99,17 +146,77 @@ class CommandOutputExtractor:
         'not_found': r'(?i)(?:not found|找不到|无法找到).*',
         'timeout': r'(?i)timeout.*',
         'connection': r'(?i)connection (?:refused|reset|closed).*',
-    }
+    }.items()}
 
     # 噪音模式（始终过滤）
-    NOISE_PATTERNS = [
+    NOISE_PATTERNS = [re.compile(p) for p in (
         r'^\s*$',  # 空行
         r'^[\-=]{3,}$',  # 分隔线
-        r'(?i)^debug[:：\s]',  # Debug日志
-        r'(?i)^trace[:：\s]',  # Trace日志
+        r'(?i:^debug[:：\s])',  # Debug日志
+        r'(?i:^trace[:：\s])',  # Trace日志
         r'^[\d\-:T\.]+\s+(?:DEBUG|TRACE)',  # 时间戳+DEBUG
+    )]
+
+    # 噪音行可能的首字符（另加空白和数字），其余行无需进入正则
+    _NOISE_FIRST_CHARS = frozenset('-=:.dDtT')
+
+    # 每组模式合并后的分支正则，分类/过滤时只需一次匹配
+    _NOISE_COMMANDS_RE = _union(NOISE_COMMANDS)
+    _INFO_COMMANDS_RE = _union(INFO_COMMANDS)
+    _DIRECTORY_COMMANDS_RE = _union(DIRECTORY_COMMANDS)
+    _NOISE_PATTERNS_RE = _union(NOISE_PATTERNS)
+
+    # 错误类型关键词：一次扫描收集出现过的关键词，再按优先级判定类型
+    _ERROR_TYPE_RE = re.compile(
+        r'(?P<permission>permission denied|access denied)'
+        r'|(?P<not_found>not found|找不到)'
+        r'|(?P<timeout>timeout)'
+        r'|(?P<connection>connection (?:refused|reset))'
+        r'|(?P<syntax>syntax error)'
+        r'|(?P<memory>out of memory|oom)'
+        r'|(?P<disk>disk)|(?P<full>full|space)'
+        r'|(?P<port>port)|(?P<in_use>already in use)',
+        re.IGNORECASE,
+    )
+    # 按优先级排列：(所需关键词, 错误类型)
+    _ERROR_TYPES = [
+        ({'permission'}, "Permission Error"),
+        ({'not_found'}, "Not Found Error"),
+        ({'timeout'}, "Timeout Error"),
+        ({'connection'}, "Connection Error"),
+        ({'syntax'}, "Syntax Error"),
+        ({'memory'}, "Memory Error"),
+        ({'disk', 'full'}, "Disk Space Error"),
+        ({'port', 'in_use'}, "Port Conflict Error"),
     ]
 
+    # 成功标志关键词（忽略大小写，省去每行 lower() 拷贝）
+    _NOISE_SUCCESS_RE = re.compile(r'success|completed|done|成功|完成', re.IGNORECASE)
+    _OPERATION_SUCCESS_RE = re.compile(
+        r'success|completed|done|started|running|成功|完成|启动|运行中', re.IGNORECASE
+    )
+
+    # 非空行（逐行扫描，不生成整段 split 列表）
+    _LINE_RE = re.compile(r'[^\n]+')
+    # 所有行（含空行及行尾换行符）
+    _RAW_LINE_RE = re.compile(r'[^\n]*\n|[^\n]+')
+
+    # Linux ls -l 行: drwxr-xr-x 2 user group 4096 Dec 12 23:52 dirname
+    LS_LONG_PATTERN = re.compile(r'^([drwx\-]{10})\s+\d+\s+\S+\s+\S+\s+\d+\s+\w+\s+\d+\s+[\d:]+\s+(.+)$')
+
+    # 超大输出只扫描头尾窗口（字符数）：错误几乎都在结尾，成功标志在开头或结尾
+    WINDOW_HEAD_CHARS = 64 * 1024
+    WINDOW_TAIL_CHARS = 192 * 1024
+
+    # PowerShell Mode 列允许的字符
+    _MODE_CHARS = frozenset('dDaArRhHsSlL-')
+
+    # 成功输出短于此字符数时跳过模式扫描，直接原样保留
+    SMALL_OUTPUT_CHARS = 200
+
+    # 判断目录列表格式时最多检查的非空行数
+    LISTING_DETECT_LINES = 10
+
     def __init__(self, max_success_lines: int = 50, max_error_lines: int = 100):
         """
         初始化提取器
@@ -121,7 +228,10 @@ class CommandOutputExtractor:
         self.max_success_lines = max_success_lines
         self.max_error_lines = max_error_lines
 
-    def _classify_command(self, command: str) -> CommandType:
+    # 部署过程中同一批命令反复出现，按命令缓存分类结果
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _classify_command(cls, command: str) -> CommandType:
         """
         分类命令类型
 
@@ -134,27 +244,24 @@ class CommandOutputExtractor:
         command_lower = command.strip().lower()
 
         # 检查是否为噪音型命令
-        for pattern in self.NOISE_COMMANDS:
-            if re.match(pattern, command_lower):
-                return CommandType.NOISE
+        if cls._NOISE_COMMANDS_RE.match(command_lower):
+            return CommandType.NOISE
 
         # 检查是否为目录列表命令（优先于 INFO，因为需要特殊处理）
-        for pattern in self.DIRECTORY_COMMANDS:
-            if re.match(pattern, command_lower):
-                return CommandType.DIRECTORY
+        if cls._DIRECTORY_COMMANDS_RE.match(command_lower):
+            return CommandType.DIRECTORY
 
         # 检查是否为信息型命令
-        for pattern in self.INFO_COMMANDS:
-            if re.match(pattern, command_lower):
-                return CommandType.INFO
+        if cls._INFO_COMMANDS_RE.match(command_lower):
+            return CommandType.INFO
 
         # 默认为操作型命令
         return CommandType.OPERATION
 
     def extract(
         self,
-        stdout: str,
-        stderr: str,
+        stdout: Union[str, bytes],
+        stderr: Union[str, bytes],
         success: bool,
         exit_code: int,
         command: str = ""
@@ -163,8 +270,8 @@ class CommandOutputExtractor:
         智能提取命令输出
 
         Args:
-            stdout: 标准输出
-            stderr: 错误输出
+            stdout: 标准输出（可直接传入 subprocess 的原始 bytes）
+            stderr: 错误输出（同上）
             success: 是否成功
             exit_code: 退出码
             command: 执行的命令（用于上下文理解）
@@ -172,28 +279,79 @@ class CommandOutputExtractor:
         Returns:
             ExtractedOutput: 提取后的结构化输出
         """
-        full_output = f"{stdout}\n{stderr}".strip()
-        full_length = len(full_output)
+        # 超大输出先截取头尾窗口，保证扫描工作量有上限
+        stdout, stdout_omitted = self._window(stdout)
+        stderr, stderr_omitted = self._window(stderr)
 
-        # 分类命令
+        # 合并输出只构建一次，传给后续各步骤，避免大输出被反复拼接拷贝；
+        # 只有一侧有内容时（成功命令通常没有 stderr）直接复用该字符串
+        combined_output = f"{stdout}\n{stderr}" if stdout and stderr else stdout or stderr
+        # 原始长度（含被截去的部分），用于压缩比统计
+        full_length = self._stripped_length(combined_output) + stdout_omitted + stderr_omitted
+
+        # 分类命令（按命令字符串缓存）
         cmd_type = self._classify_command(command)
 
+        # 短小的成功输出（pwd、版本号等）原样保留，摘要反而比输出本身更费事；
+        # 目录列表仍然解析成 [DIR]/[FILE] 条目
+        if success and full_length < self.SMALL_OUTPUT_CHARS and cmd_type != CommandType.DIRECTORY:
+            key_info = [line.strip() for line in combined_output.splitlines() if line.strip()]
+            return ExtractedOutput(
+                summary=f"✓ {command[:50]} (Full output: {len(key_info)} lines)",
+                key_info=key_info,
+                error_context=None,
+                full_length=full_length,
+                extracted_length=full_length
+            )
+
         if success:
-            return self._extract_success_output(stdout, stderr, command, full_length, cmd_type)
+            return self._extract_success_output(combined_output, command, full_length, cmd_type)
         else:
-            return self._extract_error_output(stdout, stderr, exit_code, command, full_length)
+            return self._extract_error_output(
+                stdout, stderr, combined_output, exit_code, command, full_length
+            )
+
+    def _window(self, text: Union[str, bytes]) -> Tuple[str, int]:
+        """
+        超长文本只保留头尾窗口
+
+        bytes 输入先截取再解码，超大输出不会整体解码成 str；
+        截去的长度按字符数统计，与 str 输入一致
+
+        Returns:
+            (截取后的文本, 比原文本少的字符数)
+        """
+        if len(text) <= self.WINDOW_HEAD_CHARS + self.WINDOW_TAIL_CHARS:
+            return self._decode(text), 0
+        head = text[:self.WINDOW_HEAD_CHARS]
+        tail = text[-self.WINDOW_TAIL_CHARS:]
+        length = self._char_length(text)
+        omitted = length - self._char_length(head) - self._char_length(tail)
+        windowed = f"{self._decode(head)}\n... ({omitted} chars truncated) ...\n{self._decode(tail)}"
+        return windowed, length - len(windowed)
+
+    @staticmethod
+    def _char_length(text: Union[str, bytes]) -> int:
+        """字符数；UTF-8 bytes 不解码，数非续字节（0x80-0xBF 以外）的个数"""
+        if isinstance(text, bytes):
+            return len(text) - len(text.translate(None, _UTF8_LEAD_BYTES))
+        return len(text)
+
+    @staticmethod
+    def _decode(text: Union[str, bytes]) -> str:
+        """bytes 按 UTF-8 解码（窗口边界截断的字符替换为 U+FFFD）"""
+        if isinstance(text, bytes):
+            return text.decode('utf-8', errors='replace')
+        return text
 
     def _extract_success_output(
         self,
-        stdout: str,
-        stderr: str,
+        combined_output: str,
         command: str,
         full_length: int,
         cmd_type: CommandType
     ) -> ExtractedOutput:
         """提取成功时的关键信息"""
-        combined_output = f"{stdout}\n{stderr}"
-
         # 根据命令类型应用不同策略
         if cmd_type == CommandType.NOISE:
             # 噪音型:只保留摘要信息
@@ -215,34 +373,27 @@ class CommandOutputExtractor:
         full_length: int
     ) -> ExtractedOutput:
         """噪音型命令:只保留最少信息"""
-        lines = combined_output.split('\n')
         key_info = []
 
         # 1. 提取关键模式(port/pid等)
-        for info_type, pattern in self.KEY_PATTERNS.items():
-            matches = re.findall(pattern, combined_output, re.IGNORECASE)
-            if matches:
-                unique_matches = list(set(matches))[:2]
-                for match in unique_matches:
-                    key_info.append(f"{info_type}: {match}")
-
-        # 2. 提取包含成功标志的行(最多3行)
-        success_keywords = ['successfully', 'success', 'completed', 'done', '成功', '完成']
-        for line in lines:
+        key_info.extend(self._find_key_info(combined_output, 2))
+
+        # 2. 提取包含成功标志的行(最多3行)，逐行扫描，不整体 split
+        for match in self._LINE_RE.finditer(combined_output):
             if len(key_info) >= 3:
                 break
-            line_stripped = line.strip()
-            if any(kw in line_stripped.lower() for kw in success_keywords):
+            line_stripped = match.group().strip()
+            if self._NOISE_SUCCESS_RE.search(line_stripped):
                 if len(line_stripped) < 150:
                     key_info.append(line_stripped)
 
         # 3. 如果什么都没提取到,就保留最后一行
         if not key_info:
-            last_line = lines[-1].strip() if lines else ""
+            last_line = self._last_lines(combined_output, 1)[0].strip()
             if last_line:
                 key_info.append(last_line)
 
-        summary = f"✓ {command[:40]}... (Output suppressed: {len(lines)} lines)"
+        summary = f"✓ {command[:40]}... (Output suppressed: {self._count_lines(combined_output)} lines)"
         extracted_text = "\n".join(key_info)
 
         return ExtractedOutput(
@@ -253,6 +404,60 @@ class CommandOutputExtractor:
             extracted_length=len(extracted_text)
         )
 
+    @staticmethod
+    def _stripped_length(text: str) -> int:
+        """等价于 len(text.strip())，但不拷贝文本（首尾空白通常只有几个字符）"""
+        start, end = 0, len(text)
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return end - start
+
+    @staticmethod
+    def _count_lines(text: str) -> int:
+        """只需要行数时直接数换行符（结尾换行后的空串不算一行）"""
+        if not text:
+            return 0
+        return text.count('\n') + 1 - text.endswith('\n')
+
+    @staticmethod
+    def _last_lines(text: str, count: int) -> List[str]:
+        """只从末尾切出最后 count 行；结尾换行后的空串不算一行"""
+        tail = text.rsplit('\n', count + 1)
+        if len(tail) > 1 and tail[-1] == '':
+            tail.pop()
+        return tail[-count:]
+
+    @classmethod
+    def _find_key_info(cls, text: str, limit: int) -> List[str]:
+        """
+        单次扫描提取各类关键信息
+
+        Args:
+            text: 要扫描的输出
+            limit: 每类最多保留的不重复匹配数
+
+        Returns:
+            "类型: 值" 列表，按 KEY_PATTERNS 顺序分组，组内按出现顺序
+        """
+        # dict 保持插入顺序，同时提供 O(1) 去重
+        found: Dict[str, Dict[str, None]] = {info_type: {} for info_type in cls.KEY_PATTERNS}
+        remaining = len(found)
+        for match in cls._KEY_PATTERNS_RE.finditer(text):
+            info_type = match.lastgroup
+            values = found[info_type]
+            if len(values) >= limit:
+                continue
+            # 有内部分组时（如端口号）取分组内容
+            inner = cls._KEY_INNER_GROUPS[info_type]
+            values[match.group(inner) if inner else match.group()] = None
+            if len(values) >= limit:
+                remaining -= 1
+                if not remaining:
+                    break  # 每类都已找够
+        return [f"{info_type}: {value}" for info_type, values in found.items() for value in values]
+
     def _extract_info_output(
         self,
         combined_output: str,
@@ -260,17 +465,16 @@ class CommandOutputExtractor:
         full_length: int
     ) -> ExtractedOutput:
         """信息型命令:完整保留输出"""
-        lines = combined_output.split('\n')
+        line_count = self._count_lines(combined_output)
 
-        # 保留所有行,但限制最多1000行避免内存问题
+        # 保留所有行,但限制最多1000行避免内存问题；只切出前1000行，不整体 split
         max_lines = 1000
-        if len(lines) > max_lines:
-            key_info = lines[:max_lines]
-            key_info.append(f"... ({len(lines) - max_lines} more lines omitted)")
-        else:
-            key_info = lines
+        lines = (m.group().rstrip('\r\n') for m in self._RAW_LINE_RE.finditer(combined_output))
+        key_info = list(islice(lines, max_lines))
+        if line_count > max_lines:
+            key_info.append(f"... ({line_count - max_lines} more lines omitted)")
 
-        summary = f"✓ {command[:50]} (Full output: {len(lines)} lines)"
+        summary = f"✓ {command[:50]} (Full output: {line_count} lines)"
 
         return ExtractedOutput(
             summary=summary,
@@ -293,7 +497,7 @@ class CommandOutputExtractor:
         - Linux ls -l (permissions, links, owner, group, size, date, name)
         - 简单 ls 输出 (空格/换行分隔的文件名)
         """
-        lines = combined_output.split('\n')
+        lines = combined_output.splitlines()
         key_info = []
         directory_path = None
         
@@ -306,68 +510,13 @@ class CommandOutputExtractor:
                 key_info.append(f"path: {directory_path}")
                 break
         
-        # 2. 解析 PowerShell Get-ChildItem 表格格式
-        # 格式1 (带 Length): d-----  2025/12/12  23:52  1234  filename
-        # 格式2 (无 Length, -Directory): d-----  2025/12/12  23:52  dirname
-        # 通用模式: Mode(6字符) + 日期时间 + 可选Length + Name
-        # 使用更简单的方法：按空格分割，检查第一列是否是 Mode
-        
-        for line in lines:
-            line_stripped = line.strip()
-            parts = line_stripped.split()
-            
-            # 需要至少4列：Mode, Date, Time, Name（或更多）
-            if len(parts) < 4:
-                continue
-            
-            mode = parts[0]
-            # 检查是否是有效的 PowerShell Mode 格式（6字符，以 d/- 开头）
-            if len(mode) == 6 and mode[0] in 'dD-' and all(c in 'dDaArRhHsSlL-' for c in mode):
-                # 跳过标题行
-                if mode == '------' or mode.lower() == 'mode':
-                    continue
-                
-                # 最后一个部分是文件/目录名
-                name = parts[-1]
-                
-                # 跳过标题行的 "Name"
-                if name.lower() == 'name' or name.startswith('--'):
-                    continue
-                
-                is_dir = mode.lower().startswith('d')
-                prefix = "[DIR]" if is_dir else "[FILE]"
-                key_info.append(f"{prefix} {name}")
-        
-        # 3. 如果没有匹配到 PowerShell 格式，尝试 Linux ls -l 格式
-        # 格式: drwxr-xr-x 2 user group 4096 Dec 12 23:52 dirname
-        if len(key_info) <= 1:  # 只有路径或空
-            linux_pattern = r'^([drwx\-]{10})\s+\d+\s+\S+\s+\S+\s+\d+\s+\w+\s+\d+\s+[\d:]+\s+(.+)$'
-            for line in lines:
-                line_stripped = line.strip()
-                match = re.match(linux_pattern, line_stripped)
-                if match:
-                    mode = match.group(1)
-                    name = match.group(2).strip()
-                    if name:
-                        is_dir = mode.startswith('d')
-                        prefix = "[DIR]" if is_dir else "[FILE]"
-                        key_info.append(f"{prefix} {name}")
-        
-        # 4. 如果还是没有匹配，尝试简单的文件名列表（ls 无参数输出）
-        if len(key_info) <= 1:
-            for line in lines:
-                line_stripped = line.strip()
-                # 跳过空行、标题行、分隔线
-                if not line_stripped or line_stripped.startswith('-') or 'Mode' in line_stripped:
-                    continue
-                # 跳过目录路径行
-                if line_stripped.startswith('目录:') or line_stripped.startswith('Directory:'):
-                    continue
-                # 简单文件名（可能空格分隔多个）
-                names = line_stripped.split()
-                for name in names:
-                    if name and len(name) < 256:  # 合理的文件名长度
-                        key_info.append(f"[ITEM] {name}")
+        # 2. 根据开头几行判断列表格式，只运行对应的解析器；
+        #    解析结果不足时（只有路径或空）再依次尝试其余格式
+        parsers = self._detect_listing_parsers(lines)
+        for i, parser in enumerate(parsers):
+            if i and len(key_info) > 1:
+                break
+            key_info.extend(parser(lines))
         
         # 5. 限制最大条目数
         max_items = 100
@@ -388,6 +537,115 @@ class CommandOutputExtractor:
             extracted_length=len(extracted_text)
         )
 
+    def _detect_listing_parsers(self, lines: List[str]) -> List:
+        """
+        根据前几行非空输出判断目录列表格式
+
+        Returns:
+            按尝试顺序排列的解析方法
+        """
+        checked = 0
+        for line in lines:
+            line_stripped = line.strip()
+            if not line_stripped:
+                continue
+            if self._parse_powershell_row(line_stripped):
+                return [self._parse_powershell_listing, self._parse_ls_long_listing, self._parse_bare_listing]
+            if self.LS_LONG_PATTERN.match(line_stripped):
+                return [self._parse_ls_long_listing, self._parse_bare_listing]
+            checked += 1
+            if checked >= self.LISTING_DETECT_LINES:
+                break
+        # 开头看不出格式（如表格前有其他输出）时按原顺序逐个尝试
+        return [self._parse_powershell_listing, self._parse_ls_long_listing, self._parse_bare_listing]
+
+    @classmethod
+    def _parse_powershell_row(cls, line_stripped: str) -> Optional[str]:
+        """
+        解析 PowerShell Get-ChildItem 表格的一行
+
+        格式1 (带 Length): d-----  2025/12/12  23:52  1234  filename
+        格式2 (无 Length, -Directory): d-----  2025/12/12  23:52  dirname
+        通用模式: Mode(6字符) + 日期时间 + 可选Length + Name
+
+        Returns:
+            "[DIR] name" / "[FILE] name"，不是数据行时为 None
+        """
+        # 先逐字符检查第一列是否是有效的 PowerShell Mode 格式（6字符，以 d/- 开头），
+        # 大多数非表格行因此无需 split
+        if (
+            len(line_stripped) < 7
+            or not line_stripped[6].isspace()
+            or line_stripped[0] not in 'dD-'
+            or not cls._MODE_CHARS.issuperset(line_stripped[:6])
+        ):
+            return None
+        
+        parts = line_stripped.split()
+        
+        # 需要至少4列：Mode, Date, Time, Name（或更多）
+        if len(parts) < 4:
+            return None
+        
+        # 跳过标题行
+        mode = parts[0]
+        if mode == '------':
+            return None
+        
+        # 最后一个部分是文件/目录名
+        name = parts[-1]
+        
+        # 跳过标题行的 "Name"
+        if name.lower() == 'name' or name.startswith('--'):
+            return None
+        
+        is_dir = mode.lower().startswith('d')
+        prefix = "[DIR]" if is_dir else "[FILE]"
+        return f"{prefix} {name}"
+
+    def _parse_powershell_listing(self, lines: List[str]) -> List[str]:
+        """解析 PowerShell Get-ChildItem 表格格式"""
+        items = []
+        for line in lines:
+            item = self._parse_powershell_row(line.strip())
+            if item:
+                items.append(item)
+        return items
+
+    def _parse_ls_long_listing(self, lines: List[str]) -> List[str]:
+        """解析 Linux ls -l 格式: drwxr-xr-x 2 user group 4096 Dec 12 23:52 dirname"""
+        items = []
+        for line in lines:
+            line_stripped = line.strip()
+            match = self.LS_LONG_PATTERN.match(line_stripped)
+            if match:
+                mode = match.group(1)
+                name = match.group(2).strip()
+                if name:
+                    is_dir = mode.startswith('d')
+                    prefix = "[DIR]" if is_dir else "[FILE]"
+                    items.append(f"{prefix} {name}")
+        return items
+
+    @staticmethod
+    def _parse_bare_listing(lines: List[str]) -> List[str]:
+        """解析简单的文件名列表（ls 无参数输出）"""
+        items = []
+        for line in lines:
+            line_stripped = line.strip()
+            # 跳过空行、标题行、分隔线
+            if not line_stripped or line_stripped.startswith('-') or 'Mode' in line_stripped:
+                continue
+            # 跳过目录路径行
+            if line_stripped.startswith('目录:') or line_stripped.startswith('Directory:'):
+                continue
+            # 简单文件名（可能空格分隔多个）
+            names = line_stripped.split()
+            for name in names:
+                if name and len(name) < 256:  # 合理的文件名长度
+                    items.append(f"[ITEM] {name}")
+        return items
+
     def _extract_operation_output(
         self,
         combined_output: str,
@@ -397,24 +655,13 @@ class CommandOutputExtractor:
         """操作型命令:提取关键信息(原有逻辑)"""
         key_info = []
 
-        # 1. 提取关键模式匹配
-        for info_type, pattern in self.KEY_PATTERNS.items():
-            matches = re.findall(pattern, combined_output, re.IGNORECASE)
-            if matches:
-                # 去重
-                unique_matches = list(set(matches))[:3]  # 最多保留3个同类
-                for match in unique_matches:
-                    key_info.append(f"{info_type}: {match}")
-
-        # 2. 提取包含关键词的行
-        success_keywords = [
-            'successfully', 'success', 'completed', 'done', 'started', 'running',
-            '成功', '完成', '启动', '运行中'
-        ]
-        lines = combined_output.split('\n')
-        for line in lines:
-            line_stripped = line.strip()
-            if any(kw in line_stripped.lower() for kw in success_keywords):
+        # 1. 提取关键模式匹配（去重，最多保留3个同类）
+        key_info.extend(self._find_key_info(combined_output, 3))
+
+        # 2. 提取包含关键词的行（逐行扫描，达到上限即停止，不整体 split）
+        for match in self._LINE_RE.finditer(combined_output):
+            line_stripped = match.group().strip()
+            if self._OPERATION_SUCCESS_RE.search(line_stripped):
                 if len(line_stripped) < 200:  # 避免超长行
                     key_info.append(line_stripped)
                 if len(key_info) >= self.max_success_lines:
@@ -422,8 +669,7 @@ class CommandOutputExtractor:
 
         # 3. 如果没有提取到任何信息，保留最后几行
         if not key_info:
-            last_lines = [l.strip() for l in lines[-5:] if l.strip()]
-            key_info = last_lines
+            key_info = [s for s in (l.strip() for l in self._last_lines(combined_output, 5)) if s]
 
         # 4. 生成总结
         summary = self._generate_success_summary(command, key_info)
@@ -441,6 +687,7 @@ class CommandOutputExtractor:
         self,
         stdout: str,
         stderr: str,
+        combined_output: str,
         exit_code: int,
         command: str,
         full_length: int
@@ -457,7 +704,7 @@ class CommandOutputExtractor:
             error_lines.extend(self._extract_error_lines(stdout))
 
         # 3. 提取错误类型
-        error_type = self._identify_error_type(f"{stdout}\n{stderr}")
+        error_type = self._identify_error_type(combined_output)
 
         # 4. 限制行数
         if len(error_lines) > self.max_error_lines:
@@ -486,57 +733,65 @@ class CommandOutputExtractor:
         - 使用头尾结合的方式，确保不丢失关键信息
         - 避免复杂的模式匹配，提高可靠性和可维护性
         """
-        lines = text.split('\n')
-        # 去除空行和噪音行
-        clean_lines = [l.strip() for l in lines if l.strip() and not self._is_noise(l.strip())]
+        # 流式扫描：只保留前20行和最后10行，超大输出也不必整体 split
+        head_lines = []
+        tail_lines = deque(maxlen=10)
+        clean_count = 0
+        for match in self._LINE_RE.finditer(text):
+            # 去除空行和噪音行
+            line = match.group().strip()
+            if not line or self._is_noise(line):
+                continue
+            clean_count += 1
+            if len(head_lines) < 20:
+                head_lines.append(line)
+            tail_lines.append(line)
         
         # 如果行数少，全部保留
-        if len(clean_lines) <= 20:
-            return clean_lines
+        if clean_count <= 20:
+            return head_lines
         
         # 头尾结合：前5行 + 后10行
-        head_lines = clean_lines[:5]
-        tail_lines = clean_lines[-10:]
+        head_lines = head_lines[:5]
+        tail_lines = list(tail_lines)
         
         # 计算中间跳过了多少行
-        omitted_count = len(clean_lines) - 15
+        omitted_count = clean_count - 15
         separator = [f"... ({omitted_count} lines omitted) ..."] if omitted_count > 0 else []
         
         return head_lines + separator + tail_lines
 
     def _is_noise(self, line: str) -> bool:
         """判断是否为噪音行"""
-        for pattern in self.NOISE_PATTERNS:
-            if re.match(pattern, line):
-                return True
-        return False
+        if not line:
+            return True
+        first = line[0]
+        if first not in self._NOISE_FIRST_CHARS and not first.isspace() and not first.isdecimal():
+            return False
+        return self._NOISE_PATTERNS_RE.match(line) is not None
 
     def _identify_error_type(self, text: str) -> str:
         """识别错误类型"""
-        text_lower = text.lower()
-
-        if 'permission denied' in text_lower or 'access denied' in text_lower:
-            return "Permission Error"
-        elif 'not found' in text_lower or '找不到' in text_lower:
-            return "Not Found Error"
-        elif 'timeout' in text_lower:
-            return "Timeout Error"
-        elif 'connection refused' in text_lower or 'connection reset' in text_lower:
-            return "Connection Error"
-        elif 'syntax error' in text_lower:
-            return "Syntax Error"
-        elif 'out of memory' in text_lower or 'oom' in text_lower:
-            return "Memory Error"
-        elif 'disk' in text_lower and ('full' in text_lower or 'space' in text_lower):
-            return "Disk Space Error"
-        elif 'port' in text_lower and 'already in use' in text_lower:
-            return "Port Conflict Error"
-        else:
-            return "Unknown Error"
+        # 不对整段输出做 lower() 拷贝，也不逐个关键词重复扫描
+        found = set()
+        for match in self._ERROR_TYPE_RE.finditer(text):
+            found.add(match.lastgroup)
+            if match.lastgroup == 'permission':
+                break  # 最高优先级，无需继续扫描
+
+        for required, error_type in self._ERROR_TYPES:
+            if required <= found:
+                return error_type
+        return "Unknown Error"
+
+    @staticmethod
+    def _short_command(command: str) -> str:
+        """截断过长的命令用于摘要"""
+        return command[:50] + "..." if len(command) > 50 else command
 
     def _generate_success_summary(self, command: str, key_info: List[str]) -> str:
         """生成成功总结"""
-        cmd_short = command[:50] + "..." if len(command) > 50 else command
+        cmd_short = self._short_command(command)
 
         if not key_info:
             return f"✓ Command succeeded: {cmd_short}"
@@ -556,7 +811,7 @@ class CommandOutputExtractor:
         error_lines: List[str]
     ) -> str:
         """生成错误总结"""
-        cmd_short = command[:50] + "..." if len(command) > 50 else command
+        cmd_short = self._short_command(command)
 
         # 提取第一行错误消息（增加长度限制以显示完整的PowerShell错误描述）
         first_error = error_lines[0] if error_lines else "No error details"
@@ -572,24 +827,33 @@ class CommandOutputExtractor:
         Returns:
             格式化后的字符串，供prompt使用
         """
-        parts = [extracted.summary]
+        # 直接写入缓冲区，不生成中间的字符串列表
+        buf = io.StringIO()
+        buf.write(extracted.summary)
 
         if extracted.key_info:
-            parts.append("Key Info:")
-            parts.extend([f"  - {info}" for info in extracted.key_info[:10]])
+            buf.write("\nKey Info:")
+            for info in extracted.key_info[:10]:
+                buf.write("\n  - ")
+                buf.write(info)
 
         if extracted.error_context:
-            parts.append("Error Details:")
+            buf.write("\nError Details:\n")
             # 限制错误上下文长度
-            error_preview = extracted.error_context[:800]
+            buf.write(extracted.error_context[:800])
             if len(extracted.error_context) > 800:
-                error_preview += f"\n... ({len(extracted.error_context) - 800} more chars)"
-            parts.append(error_preview)
+                buf.write(f"\n... ({len(extracted.error_context) - 800} more chars)")
 
         # 压缩比信息不包含在LLM上下文中，只通过logger记录
         # 调用方会通过logger.info记录压缩统计信息
 
-        return "\n".join(parts)
+        return buf.getvalue()
+
+
+# 提取器无状态（模式均为类属性），同一配置复用同一实例
+@lru_cache(maxsize=8)
+def _get_extractor(max_success_lines: int, max_error_lines: int) -> CommandOutputExtractor:
+    return CommandOutputExtractor(max_success_lines, max_error_lines)
 
 
 # 便捷函数
@@ -608,6 +872,6 @@ def extract_output(
     Returns:
         格式化后的字符串，可直接用于LLM prompt
     """
-    extractor = CommandOutputExtractor(max_success_lines, max_error_lines)
+    extractor = _get_extractor(max_success_lines, max_error_lines)
     extracted = extractor.extract(stdout, stderr, success, exit_code, command)
     return extractor.format_for_llm(extracted)
@@ -0,0 +1,151 @@
+"""Client-side rate limiting for LLM providers.
+
+This module provides a thread-safe token bucket (requests per minute) combined
+with a concurrency cap, so parallel callers saturate but never exceed the
+provider's quota instead of triggering long 429 backoffs.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default requests-per-minute limits (entry-level paid / free tiers)
+# None means the provider does not publish a fixed RPM limit
+PROVIDER_RATE_LIMITS: Dict[str, Optional[int]] = {
+    "gemini": 15,        # Free tier for flash models
+    "openai": 500,       # Tier 1
+    "anthropic": 50,     # Tier 1
+    "deepseek": None,    # No fixed limit, throttles dynamically
+    "openrouter": None,  # Depends on credits and model
+    "openai-compatible": None,
+}
+
+# Default maximum number of in-flight requests per provider
+DEFAULT_MAX_CONCURRENCY = 4
+
+# 429 backoff without Retry-After: 1s, 2s, 4s, ... plus jitter, capped
+RETRY_BACKOFF_CAP = 30
+# Upper bound for a server-provided Retry-After (seconds)
+RETRY_AFTER_MAX = 120
+
+
+class LLMRateLimiter:
+    """Token bucket over requests per minute plus a concurrency semaphore."""
+
+    def __init__(self, requests_per_minute: Optional[int], max_concurrency: int):
+        """
+        Initialize rate limiter.
+
+        Args:
+            requests_per_minute: Allowed requests per minute, None for unlimited
+            max_concurrency: Maximum number of simultaneous requests
+        """
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self._rate = requests_per_minute / 60.0 if requests_per_minute else None
+        self._capacity = float(requests_per_minute or 0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def acquire(self) -> None:
+        """Block until a concurrency slot and a request token are available."""
+        self._semaphore.acquire()
+        if self._rate is None:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self._rate
+            logger.debug(f"Rate limit reached, waiting {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+    def release(self) -> None:
+        """Release the concurrency slot taken by acquire()."""
+        self._semaphore.release()
+
+    def __enter__(self) -> "LLMRateLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+
+# Limiters are process-wide because quotas apply per account, not per instance
+_LIMITERS: Dict[Tuple[str, Optional[int], int, str], LLMRateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    requests_per_minute: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    key_id: str = "",
+) -> LLMRateLimiter:
+    """
+    Return the shared rate limiter for a provider.
+
+    Args:
+        provider: Provider name (key of PROVIDER_RATE_LIMITS)
+        requests_per_minute: Override for the provider's default RPM
+        max_concurrency: Override for DEFAULT_MAX_CONCURRENCY
+        key_id: Fingerprint of an additional API key (each key has its own quota)
+
+    Returns:
+        LLMRateLimiter shared by all providers with the same settings
+    """
+    rpm = requests_per_minute or PROVIDER_RATE_LIMITS.get(provider)
+    concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+    key = (provider, rpm, concurrency, key_id)
+
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = LLMRateLimiter(rpm, concurrency)
+            _LIMITERS[key] = limiter
+            logger.debug(f"Rate limiter for {provider}: {rpm or 'unlimited'} rpm, {concurrency} concurrent")
+        return limiter
+
+
+def retry_delay(response: Any, attempt: int) -> float:
+    """
+    Return how long to wait before retrying a rate-limited (429) request.
+
+    Honors the ``Retry-After`` header (seconds or HTTP date) and otherwise
+    backs off exponentially with jitter so parallel callers do not retry in
+    lockstep.
+
+    Args:
+        response: The 429 response
+        attempt: Zero-based retry attempt
+
+    Returns:
+        Delay in seconds
+    """
+    retry_after = response.headers.get("Retry-After") if response.headers else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0.0), RETRY_AFTER_MAX)
+    return min(2 ** attempt + random.random(), RETRY_BACKOFF_CAP)
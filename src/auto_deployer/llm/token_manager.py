@@ -6,7 +6,7 @@ This module provides token counting and limit checking for different LLM provide
 from __future__ import annotations
 
 import logging
-from typing import Dict, Union
+from typing import Dict, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +39,35 @@ PROVIDER_TOKEN_LIMITS: Dict[str, Union[int, Dict[str, int]]] = {
     "custom": 32_000,  # Alias for openai-compatible
 }
 
+# Limit used for unknown providers and unknown models
+DEFAULT_TOKEN_LIMIT = 32_000
+
+# PROVIDER_TOKEN_LIMITS flattened at import: (provider, model) -> limit for
+# per-model tables, provider -> limit for providers with a single limit
+_MODEL_LIMITS: Dict[Tuple[str, str], int] = {
+    (provider, model): limit
+    for provider, limits in PROVIDER_TOKEN_LIMITS.items() if isinstance(limits, dict)
+    for model, limit in limits.items()
+}
+_PROVIDER_LIMITS: Dict[str, int] = {
+    provider: limits for provider, limits in PROVIDER_TOKEN_LIMITS.items() if isinstance(limits, int)
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate token count for given text.
+
+    Uses a simple heuristic: 1 token ≈ 4 characters.
+
+    Args:
+        text: Text to count tokens for
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4
+
 
 class TokenManager:
     """Manages token counting and compression triggers."""
@@ -62,25 +91,18 @@ class TokenManager:
     
     def _resolve_limit(self) -> int:
         """Resolve token limit for current provider/model."""
-        limits = PROVIDER_TOKEN_LIMITS.get(self.provider)
+        limit = _MODEL_LIMITS.get((self.provider, self.model)) or _PROVIDER_LIMITS.get(self.provider)
+        if limit is not None:
+            return limit
         
-        if limits is None:
+        if self.provider not in PROVIDER_TOKEN_LIMITS:
             logger.warning(f"Unknown provider '{self.provider}', using default limit of 32K")
-            return 32_000
-        
-        if isinstance(limits, dict):
-            # Provider has per-model limits
-            limit = limits.get(self.model)
-            if limit is None:
-                logger.warning(
-                    f"Unknown model '{self.model}' for provider '{self.provider}', "
-                    f"using default limit of 32K"
-                )
-                return 32_000
-            return limit
         else:
-            # Provider has a single limit for all models
-            return limits
+            logger.warning(
+                f"Unknown model '{self.model}' for provider '{self.provider}', "
+                f"using default limit of 32K"
+            )
+        return DEFAULT_TOKEN_LIMIT
     
     def get_limit(self) -> int:
         """
@@ -106,7 +128,7 @@ class TokenManager:
         """
         # Simple estimation: divide character count by 4
         # This works reasonably well for most languages and providers
-        return len(text) // 4
+        return estimate_tokens(text)
     
     def should_compress(self, text: str, threshold: float = 0.5) -> bool:
         """
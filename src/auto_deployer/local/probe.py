@@ -4,9 +4,12 @@ from __future__ import annotations
 
 import os
 import platform
+import re
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 @dataclass
@@ -64,31 +67,62 @@ class LocalHostFacts:
 
         
 
+# Host facts that cannot change while the process runs, resolved at import
+_IS_WINDOWS = platform.system() == "Windows"
+_HOME = os.path.expanduser("~")
+
+# PRETTY_NAME line of /etc/os-release, e.g. PRETTY_NAME="Ubuntu 22.04.3 LTS"
+_PRETTY_NAME_RE = re.compile(r'^[ \t]*PRETTY_NAME=(.*)$', re.MULTILINE)
+
+# Static host metadata shared by all LocalProbe instances (see LocalProbe._host_info)
+_HOST_INFO: Optional[Dict[str, Any]] = None
+
+
 class LocalProbe:
     """Collects information about the local system."""
     
     def __init__(self) -> None:
-        self.is_windows = platform.system() == "Windows"
+        self.is_windows = _IS_WINDOWS
     
     def collect(self) -> LocalHostFacts:
-        """Collect local host facts."""
-        return LocalHostFacts(
-            hostname=platform.node(),
-            os_name=platform.system(),
-            os_release=self._get_os_release(),
-            kernel=platform.release(),
-            architecture=platform.machine(),
-            python_version=platform.python_version(),
-            home_dir=os.path.expanduser("~"),
-            is_container=self._detect_container(),
-            has_systemd=self._detect_systemd(),
-            has_git=self._check_command("git", "--version"),
-            has_node=self._check_command("node", "--version"),
-            has_npm=self._check_command("npm", "--version"),
-            has_python3=self._check_command("python3" if not self.is_windows else "python", "--version"),
-            has_pip=self._check_command("pip3" if not self.is_windows else "pip", "--version"),
-            has_docker=self._check_command("docker", "--version"),
-        )
+        """
+        Collect local host facts.
+
+        OS and container details are probed once per process; tool availability
+        is re-checked on every call, since a deployment may install tools.
+        """
+        tools = {
+            "has_git": ("git", "--version"),
+            "has_node": ("node", "--version"),
+            "has_npm": ("npm", "--version"),
+            "has_python3": ("python3" if not self.is_windows else "python", "--version"),
+            "has_pip": ("pip3" if not self.is_windows else "pip", "--version"),
+            "has_docker": ("docker", "--version"),
+        }
+        # Checks that fall back to running the tool (Windows) spawn a process;
+        # run them concurrently so the probe takes about as long as the slowest one
+        with ThreadPoolExecutor(max_workers=len(tools)) as pool:
+            futures = {name: pool.submit(self._check_command, *cmd) for name, cmd in tools.items()}
+            available = {name: future.result() for name, future in futures.items()}
+
+        return LocalHostFacts(**self._host_info(), **available)
+
+    def _host_info(self) -> Dict[str, Any]:
+        """Host metadata that cannot change while the process runs, collected once."""
+        global _HOST_INFO
+        if _HOST_INFO is None:
+            _HOST_INFO = {
+                "hostname": platform.node(),
+                "os_name": platform.system(),
+                "os_release": self._get_os_release(),
+                "kernel": platform.release(),
+                "architecture": platform.machine(),
+                "python_version": platform.python_version(),
+                "home_dir": _HOME,
+                "is_container": self._detect_container(),
+                "has_systemd": self._detect_systemd(),
+            }
+        return _HOST_INFO
     
     def _get_os_release(self) -> str:
         """Get detailed OS release info."""
@@ -103,48 +137,42 @@ class LocalProbe:
             # 尝试读取 /etc/os-release
             try:
                 with open("/etc/os-release") as f:
-                    lines = f.readlines()
-                    info = {}
-                    for line in lines:
-                        if "=" in line:
-                            key, value = line.strip().split("=", 1)
-                            info[key] = value.strip('"')
-                    return info.get("PRETTY_NAME", f"Linux {platform.release()}")
+                    match = _PRETTY_NAME_RE.search(f.read())
+                if match:
+                    return match.group(1).strip().strip('"')
             except Exception:
-                return f"Linux {platform.release()}"
+                pass
+            return f"Linux {platform.release()}"
         else:
             return platform.platform()
     
     def _check_command(self, *cmd: str) -> bool:
         """Check if a command is available."""
+        # 直接在 PATH 中查找（Windows 上包括 PATHEXT 扩展名），不启动 which/where 进程
+        if shutil.which(cmd[0]):
+            return True
+        if not self.is_windows:
+            return False
         try:
-            if self.is_windows:
-                # Windows: 使用 where 或直接运行
-                result = subprocess.run(
-                    ["where", cmd[0]],
-                    capture_output=True,
-                    timeout=5,
-                )
-                if result.returncode == 0:
-                    return True
-                # 备选：直接尝试运行
-                result = subprocess.run(
-                    list(cmd),
-                    capture_output=True,
-                    timeout=5,
-                )
-                return result.returncode == 0
-            else:
-                # Unix: 使用 which
-                result = subprocess.run(
-                    ["which", cmd[0]],
-                    capture_output=True,
-                    timeout=5,
-                )
-                return result.returncode == 0
+            # Windows 备选：直接尝试运行（程序不存在时 CreateProcess 立即失败）
+            result = subprocess.run(
+                list(cmd),
+                capture_output=True,
+                timeout=5,
+            )
+            return result.returncode == 0
         except Exception:
             return False
     
+    @staticmethod
+    def _read_proc(path: str) -> str:
+        """读取 /proc 等伪文件；不存在或不可读时返回空串（直接 open，不先 stat）"""
+        try:
+            with open(path) as f:
+                return f.read()
+        except OSError:
+            return ""
+    
     def _detect_container(self) -> bool:
         """检测是否在容器中运行"""
         if self.is_windows:
@@ -156,20 +184,12 @@ class LocalProbe:
                 return True
             
             # 方法 2: 检查 /proc/1/cgroup
-            if os.path.exists("/proc/1/cgroup"):
-                with open("/proc/1/cgroup") as f:
-                    content = f.read()
-                    if "docker" in content or "containerd" in content or "lxc" in content:
-                        return True
+            content = self._read_proc("/proc/1/cgroup")
+            if "docker" in content or "containerd" in content or "lxc" in content:
+                return True
             
             # 方法 3: 检查 /proc/1/mountinfo
-            if os.path.exists("/proc/1/mountinfo"):
-                with open("/proc/1/mountinfo") as f:
-                    content = f.read()
-                    if "/docker/" in content:
-                        return True
-            
-            return False
+            return "/docker/" in self._read_proc("/proc/1/mountinfo")
         except Exception:
             return False
     
@@ -180,10 +200,6 @@ class LocalProbe:
         
         try:
             # 检查 PID 1 是否是 systemd
-            if os.path.exists("/proc/1/comm"):
-                with open("/proc/1/comm") as f:
-                    init = f.read().strip()
-                    return init == "systemd"
-            return False
+            return self._read_proc("/proc/1/comm").strip() == "systemd"
         except Exception:
             return False
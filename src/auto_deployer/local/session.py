@@ -2,12 +2,99 @@
 
 from __future__ import annotations
 
+import codecs
+import locale
 import subprocess
 import sys
 import os
 import platform
+import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
+
+
+# 进程运行期间不变的主机信息，导入时取一次
+_IS_WINDOWS = platform.system() == "Windows"
+_HOME = os.path.expanduser("~")
+
+# Windows 命令适配
+# 这里做一些基本的转换，复杂的交给 Agent 处理
+_WINDOWS_ADAPTATIONS = {
+    # 路径转换
+    "~/": _HOME.replace("\\", "/") + "/",
+    # 常用命令转换
+    "rm -rf ": "Remove-Item -Recurse -Force ",
+    "rm -r ": "Remove-Item -Recurse -Force ",
+    "mkdir -p ": "New-Item -ItemType Directory -Force -Path ",
+    "cat ": "Get-Content ",
+    "ls ": "Get-ChildItem ",
+    "pwd": "(Get-Location).Path",
+    "which ": "Get-Command ",
+    "export ": "$env:",  # export VAR=value -> $env:VAR=value
+}
+# 长的片段优先（"rm -rf " 先于 "rm -r "）
+_WINDOWS_ADAPT_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(_WINDOWS_ADAPTATIONS, key=len, reverse=True))
+)
+
+
+# 流式执行时每次从管道读取的最大字节数
+READ_CHUNK_SIZE = 65536
+# Unix 下每次管道可读时最多连续读取的次数
+MAX_DRAIN_READS = 16
+
+
+class _Echo:
+    """
+    把子进程输出转发到终端流
+
+    子进程按本地编码输出（与 _decode_output 一致）；终端流编码相同时原样写入
+    其二进制 buffer，否则（如中文 Windows 的 GBK 输出到 UTF-8 控制台，或被替换成
+    无 buffer 的流）用增量解码器解码后按文本写入，多字节字符跨块也不会乱码。
+    """
+
+    def __init__(self, stream, encoding: Optional[str] = None) -> None:
+        self.stream = stream
+        encoding = encoding or locale.getpreferredencoding(False)
+        self._buffer = getattr(stream, "buffer", None)
+        if self._buffer is not None and _same_codec(encoding, getattr(stream, "encoding", None)):
+            self._decoder = None
+        else:
+            self._buffer = None
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if self._decoder is None:
+            self.stream.flush()
+            self._buffer.write(chunk)
+            self._buffer.flush()
+        else:
+            self.stream.write(self._decoder.decode(chunk))
+            self.stream.flush()
+
+    def close(self) -> None:
+        """输出结束时写出解码器中残留的不完整字符"""
+        if self._decoder is not None:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self.stream.write(tail)
+                self.stream.flush()
+
+
+def _same_codec(a: Optional[str], b: Optional[str]) -> bool:
+    """两个编码名是否指向同一编解码器（如 "UTF-8" 与 "utf8"）"""
+    try:
+        return bool(a and b) and codecs.lookup(a).name == codecs.lookup(b).name
+    except LookupError:
+        return False
+
+
+def _decode_output(data: bytes) -> str:
+    """与 text=True 一致：按本地编码解码，换行统一为 \\n"""
+    text = bytes(data).decode(locale.getpreferredencoding(False), errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
 
 
 @dataclass
@@ -38,9 +125,12 @@ class LocalSession:
         Args:
             working_dir: Working directory for commands. Defaults to home directory.
         """
-        self.working_dir = working_dir or os.path.expanduser("~")
-        self.is_windows = platform.system() == "Windows"
+        self.working_dir = working_dir or _HOME
+        self.is_windows = _IS_WINDOWS
         self._connected = False
+        # Subprocess environment, see _get_env
+        self._env: Optional[dict] = None
+        self._missing_paths: List[str] = []
 
     def connect(self) -> None:
         """No-op for local session (for API compatibility with SSHSession)."""
@@ -102,25 +192,8 @@ class LocalSession:
         if not self.is_windows:
             return command
         
-        # Windows 命令适配
-        # 这里做一些基本的转换，复杂的交给 Agent 处理
-        adaptations = {
-            # 路径转换
-            "~/": os.path.expanduser("~").replace("\\", "/") + "/",
-            # 常用命令转换
-            "rm -rf ": "Remove-Item -Recurse -Force ",
-            "rm -r ": "Remove-Item -Recurse -Force ",
-            "mkdir -p ": "New-Item -ItemType Directory -Force -Path ",
-            "cat ": "Get-Content ",
-            "ls ": "Get-ChildItem ",
-            "pwd": "(Get-Location).Path",
-            "which ": "Get-Command ",
-            "export ": "$env:",  # export VAR=value -> $env:VAR=value
-        }
-        
-        result = command
-        for linux_cmd, win_cmd in adaptations.items():
-            result = result.replace(linux_cmd, win_cmd)
+        # Windows 命令适配：一次扫描替换所有片段，替换结果不会再被二次替换
+        result = _WINDOWS_ADAPT_RE.sub(lambda m: _WINDOWS_ADAPTATIONS[m.group()], command)
         
         # 处理 source 命令（Windows 不需要）
         if result.startswith("source "):
@@ -189,7 +262,6 @@ class LocalSession:
                     ["powershell", "-Command", command],
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
-                    text=True,
                     cwd=self.working_dir,
                     env=self._get_env(),
                 )
@@ -199,14 +271,16 @@ class LocalSession:
                     shell=True,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
-                    text=True,
                     cwd=self.working_dir,
                     env=self._get_env(),
                     executable="/bin/bash",
                 )
             
-            stdout_chunks = []
-            stderr_chunks = []
+            # 管道以二进制读取：转发到终端（见 _Echo），结束时才一次性解码
+            stdout_buf = bytearray()
+            stderr_buf = bytearray()
+            stdout_echo = _Echo(sys.stdout)
+            stderr_echo = _Echo(sys.stderr)
             
             # 时间追踪
             start_time = time.time()
@@ -214,29 +288,26 @@ class LocalSession:
             
             # Windows 不支持 selectors 用于 pipes，使用线程
             if self.is_windows:
-                # 标志位：用于线程通信
-                output_lock = threading.Lock()
-                has_new_output = [False]  # 使用列表来允许在闭包中修改
+                # 读取线程记录最后一次输出的时间（使用列表来允许在闭包中修改）
+                last_output_time = [last_activity_time]
                 
                 def read_stdout():
                     try:
-                        for line in process.stdout:
-                            with output_lock:
-                                stdout_chunks.append(line)
-                                has_new_output[0] = True
-                            sys.stdout.write(line)
-                            sys.stdout.flush()
+                        # read1 返回管道中已有的数据，不等凑满整行
+                        for chunk in iter(lambda: process.stdout.read1(READ_CHUNK_SIZE), b""):
+                            stdout_buf.extend(chunk)
+                            last_output_time[0] = time.time()
+                            stdout_echo.write(chunk)
                     except:
                         pass
                 
                 def read_stderr():
                     try:
-                        for line in process.stderr:
-                            with output_lock:
-                                stderr_chunks.append(line)
-                                has_new_output[0] = True
-                            sys.stderr.write(line)
-                            sys.stderr.flush()
+                        # read1 返回管道中已有的数据，不等凑满整行
+                        for chunk in iter(lambda: process.stderr.read1(READ_CHUNK_SIZE), b""):
+                            stderr_buf.extend(chunk)
+                            last_output_time[0] = time.time()
+                            stderr_echo.write(chunk)
                     except:
                         pass
                 
@@ -245,23 +316,24 @@ class LocalSession:
                 t1.start()
                 t2.start()
                 
-                # 循环检查进程状态和超时
-                while process.poll() is None:
-                    # 检查是否有新输出
-                    with output_lock:
-                        if has_new_output[0]:
-                            last_activity_time = time.time()
-                            has_new_output[0] = False
+                # 阻塞等待进程结束，直到最近的超时截止时间才醒来检查，不轮询
+                while True:
+                    deadline = min(last_output_time[0] + idle_timeout, start_time + timeout)
+                    try:
+                        process.wait(timeout=max(deadline - time.time(), 0))
+                        break
+                    except subprocess.TimeoutExpired:
+                        pass
                     
-                    # 检查空闲超时
-                    idle_time = time.time() - last_activity_time
+                    # 检查空闲超时（期间有新输出则截止时间已后移，继续等待）
+                    idle_time = time.time() - last_output_time[0]
                     if idle_time > idle_timeout:
                         process.kill()
                         t1.join(timeout=1)
                         t2.join(timeout=1)
                         return LocalCommandResult(
                             command=command,
-                            stdout="".join(stdout_chunks).strip(),
+                            stdout=_decode_output(stdout_buf).strip(),
                             stderr=f"IDLE_TIMEOUT: No output for {idle_timeout} seconds. "
                                    f"Possible causes:\n"
                                    f"1. Command waiting for input (interactive prompts) - use non-interactive alternatives\n"
@@ -277,14 +349,11 @@ class LocalSession:
                         t2.join(timeout=1)
                         return LocalCommandResult(
                             command=command,
-                            stdout="".join(stdout_chunks).strip(),
+                            stdout=_decode_output(stdout_buf).strip(),
                             stderr=f"TOTAL_TIMEOUT: Command exceeded {timeout} seconds total execution time. "
                                    f"For long-running operations, use progressive sleep checks instead of blocking commands (see Progressive Timeout Strategy).",
                             exit_status=-2,
                         )
-                    
-                    # 短暂休眠避免 CPU 占用过高
-                    time.sleep(0.1)
                 
                 # 等待线程完成读取剩余输出
                 t1.join(timeout=2)
@@ -293,25 +362,34 @@ class LocalSession:
             else:
                 # Unix: 使用 selectors
                 sel = selectors.DefaultSelector()
-                sel.register(process.stdout, selectors.EVENT_READ)
-                sel.register(process.stderr, selectors.EVENT_READ)
+                # 管道设为非阻塞，直接对 fd 做 os.read，绕过 Python 的缓冲层
+                for pipe, buf, echo in (
+                    (process.stdout, stdout_buf, stdout_echo),
+                    (process.stderr, stderr_buf, stderr_echo),
+                ):
+                    os.set_blocking(pipe.fileno(), False)
+                    sel.register(pipe.fileno(), selectors.EVENT_READ, (buf, echo))
                 
                 while process.poll() is None:
                     has_activity = False
                     
-                    # 使用 select 读取可用输出
+                    # 使用 select 等待可读，然后尽量读空管道，减少 select 次数
                     for key, _ in sel.select(timeout=0.1):
-                        line = key.fileobj.readline()
-                        if line:
-                            if key.fileobj == process.stdout:
-                                stdout_chunks.append(line)
-                                sys.stdout.write(line)
-                                sys.stdout.flush()
-                            else:
-                                stderr_chunks.append(line)
-                                sys.stderr.write(line)
-                                sys.stderr.flush()
+                        buf, echo = key.data
+                        # 读取次数有上限，持续输出的命令也能及时检查超时
+                        for _ in range(MAX_DRAIN_READS):
+                            try:
+                                chunk = os.read(key.fd, READ_CHUNK_SIZE)
+                            except BlockingIOError:
+                                break
+                            if not chunk:
+                                sel.unregister(key.fd)  # EOF，避免 select 反复返回
+                                break
+                            buf.extend(chunk)
+                            echo.write(chunk)
                             has_activity = True
+                            if len(chunk) < READ_CHUNK_SIZE:
+                                break  # 管道已读空
                     
                     # 如果有输出活动，重置空闲计时器
                     if has_activity:
@@ -324,7 +402,7 @@ class LocalSession:
                         sel.close()
                         return LocalCommandResult(
                             command=command,
-                            stdout="".join(stdout_chunks).strip(),
+                            stdout=_decode_output(stdout_buf).strip(),
                             stderr=f"IDLE_TIMEOUT: No output for {idle_timeout} seconds. "
                                    f"Possible causes:\n"
                                    f"1. Command waiting for input (interactive prompts) - use non-interactive alternatives\n"
@@ -339,28 +417,28 @@ class LocalSession:
                         sel.close()
                         return LocalCommandResult(
                             command=command,
-                            stdout="".join(stdout_chunks).strip(),
+                            stdout=_decode_output(stdout_buf).strip(),
                             stderr=f"TOTAL_TIMEOUT: Command exceeded {timeout} seconds total execution time. "
                                    f"For long-running operations, use progressive sleep checks instead of blocking commands (see Progressive Timeout Strategy).",
                             exit_status=-2,
                         )
                 
-                # 读取剩余输出
-                for line in process.stdout:
-                    stdout_chunks.append(line)
-                    sys.stdout.write(line)
-                    sys.stdout.flush()
-                for line in process.stderr:
-                    stderr_chunks.append(line)
-                    sys.stderr.write(line)
-                    sys.stderr.flush()
+                # 读取剩余输出（恢复阻塞模式，读到 EOF）
+                for key in list(sel.get_map().values()):
+                    buf, echo = key.data
+                    os.set_blocking(key.fd, True)
+                    for chunk in iter(lambda: os.read(key.fd, READ_CHUNK_SIZE), b""):
+                        buf.extend(chunk)
+                        echo.write(chunk)
                 
                 sel.close()
             
+            stdout_echo.close()
+            stderr_echo.close()
             return LocalCommandResult(
                 command=command,
-                stdout="".join(stdout_chunks).strip(),
-                stderr="".join(stderr_chunks).strip(),
+                stdout=_decode_output(stdout_buf).strip(),
+                stderr=_decode_output(stderr_buf).strip(),
                 exit_status=process.returncode or 0,
             )
             
@@ -378,31 +456,48 @@ class LocalSession:
             )
 
     def _get_env(self) -> dict:
-        """Get environment variables for subprocess."""
+        """
+        Get environment variables for subprocess.
+
+        Built once per session; rebuilt only when one of the extra tool
+        directories that was missing appears (e.g. ~/.local/bin after
+        ``pip install --user``).
+        """
+        if self._env is None or any(os.path.exists(p) for p in self._missing_paths):
+            self._env = self._build_env()
+        return self._env
+
+    def _build_env(self) -> dict:
+        """Copy the process environment with common tool directories on PATH."""
         env = os.environ.copy()
         
         # 确保常用工具在 PATH 中
         if self.is_windows:
             # Windows: 添加常用路径
             extra_paths = [
-                os.path.expanduser("~\\AppData\\Roaming\\npm"),
-                os.path.expanduser("~\\AppData\\Local\\Programs\\Python\\Python3*"),
+                os.path.join(_HOME, "AppData", "Roaming", "npm"),
+                os.path.join(_HOME, "AppData", "Local", "Programs", "Python", "Python3*"),
                 "C:\\Program Files\\Git\\bin",
                 "C:\\Program Files\\nodejs",
             ]
         else:
             # Unix: 添加常用路径
             extra_paths = [
-                os.path.expanduser("~/.nvm/versions/node/*/bin"),
-                os.path.expanduser("~/.local/bin"),
+                os.path.join(_HOME, ".nvm", "versions", "node", "*", "bin"),
+                os.path.join(_HOME, ".local", "bin"),
                 "/usr/local/bin",
             ]
         
         # 简单地添加到 PATH（实际的 glob 展开留给 shell）
         current_path = env.get("PATH", "")
+        self._missing_paths = []
         for p in extra_paths:
-            if "*" not in p and os.path.exists(p):
+            if "*" in p:
+                continue
+            if os.path.exists(p):
                 current_path = p + os.pathsep + current_path
+            else:
+                self._missing_paths.append(p)
         env["PATH"] = current_path
         
         return env
@@ -57,9 +57,10 @@ class StepExecutor:
         # Initialize token manager and history compressor
         from ..llm.token_manager import TokenManager
         from ..llm.history_compressor import HistoryCompressor
+        from ..llm.cache import get_history_cache
         
         self.token_manager = TokenManager(llm_config.provider, llm_config.model)
-        self.history_compressor = HistoryCompressor(self.llm_provider)
+        self.history_compressor = HistoryCompressor(self.llm_provider, semantic_cache=get_history_cache())
         
         # Initialize loop detection components
         from .loop_detector import LoopDetector
@@ -264,6 +265,9 @@ class StepExecutor:
             build_step_execution_prompt_windows
         )
         
+        # 主机信息只序列化一次；紧凑格式（无缩进）减少 token
+        host_info = json.dumps(deploy_ctx.host_info, ensure_ascii=False, separators=(",", ":"))
+        
         # 构建 prompt
         if self.is_windows:
             prompt = build_step_execution_prompt_windows(
@@ -274,7 +278,7 @@ class StepExecutor:
                 success_criteria=step_ctx.success_criteria,
                 repo_url=deploy_ctx.repo_url,
                 deploy_dir=deploy_ctx.deploy_dir,
-                host_info=json.dumps(deploy_ctx.host_info, indent=2, ensure_ascii=False),
+                host_info=host_info,
                 commands_history=self._format_commands(step_ctx),
                 user_interactions=self._format_interactions(step_ctx.user_interactions),
                 max_iterations=self.max_iterations,
@@ -290,7 +294,7 @@ class StepExecutor:
                 success_criteria=step_ctx.success_criteria,
                 repo_url=deploy_ctx.repo_url,
                 deploy_dir=deploy_ctx.deploy_dir,
-                host_info=json.dumps(deploy_ctx.host_info, indent=2, ensure_ascii=False),
+                host_info=host_info,
                 commands_history=self._format_commands(step_ctx),
                 user_interactions=self._format_interactions(step_ctx.user_interactions),
                 max_iterations=self.max_iterations,
@@ -314,7 +318,7 @@ class StepExecutor:
                     success_criteria=step_ctx.success_criteria,
                     repo_url=deploy_ctx.repo_url,
                     deploy_dir=deploy_ctx.deploy_dir,
-                    host_info=json.dumps(deploy_ctx.host_info, indent=2, ensure_ascii=False),
+                    host_info=host_info,
                     commands_history=self._format_commands(step_ctx),
                     user_interactions=self._format_interactions(step_ctx.user_interactions),
                     max_iterations=self.max_iterations,
@@ -330,7 +334,7 @@ class StepExecutor:
                     success_criteria=step_ctx.success_criteria,
                     repo_url=deploy_ctx.repo_url,
                     deploy_dir=deploy_ctx.deploy_dir,
-                    host_info=json.dumps(deploy_ctx.host_info, indent=2, ensure_ascii=False),
+                    host_info=host_info,
                     commands_history=self._format_commands(step_ctx),
                     user_interactions=self._format_interactions(step_ctx.user_interactions),
                     max_iterations=self.max_iterations,
@@ -4,8 +4,12 @@ All data is stored under .auto-deployer directory:
 - .auto-deployer/workspace/   # Local repo clones for analysis
 - .auto-deployer/knowledge/   # ChromaDB vector store
 - .auto-deployer/memory/      # Human-readable memory exports
+
+The opt-in LLM response cache lives in the user cache directory instead, so it
+is shared between projects (override with AUTO_DEPLOYER_LLM_CACHE_DIR).
 """
 
+import os
 from pathlib import Path
 
 # 基础目录（在当前工作目录下）
@@ -41,3 +45,11 @@ def get_memory_dir() -> Path:
     """获取 memory 目录路径（人类可读导出）."""
     MEMORY_DIR.mkdir(parents=True, exist_ok=True)
     return MEMORY_DIR
+
+
+def get_llm_cache_dir() -> Path:
+    """获取 LLM 响应缓存目录（默认 ~/.cache/auto_deployer/llm，CI 可指向共享目录）."""
+    directory = os.environ.get("AUTO_DEPLOYER_LLM_CACHE_DIR")
+    path = Path(directory) if directory else Path.home() / ".cache" / "auto_deployer" / "llm"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Union
 
-from .analyzer import RepoAnalyzer, RepoContext
+from .analyzer import REPO_CONTEXT_TOKEN_BUDGET, RepoAnalyzer, RepoContext
 from .config import AppConfig
 from .interaction import UserInteractionHandler, CLIInteractionHandler, InteractionRequest, InputType, QuestionCategory
 from .llm.agent import DeploymentPlanner
@@ -240,7 +240,7 @@ class DeploymentWorkflow:
             repo_url=request.repo_url,
             deploy_dir=deploy_dir,
             host_info=host_facts.to_payload() if host_facts else {"os_name": platform.system()},
-            repo_analysis=repo_context.to_prompt_context() if repo_context else None,
+            repo_analysis=repo_context.to_prompt_context(max_tokens=REPO_CONTEXT_TOKEN_BUDGET) if repo_context else None,
             project_type=repo_context.project_type if repo_context else None,
             framework=repo_context.detected_framework if repo_context else None,
         )
@@ -343,7 +343,7 @@ class DeploymentWorkflow:
             repo_url=request.repo_url,
             deploy_dir=deploy_dir,
             host_info=host_info,
-            repo_analysis=repo_context.to_prompt_context() if repo_context else None,
+            repo_analysis=repo_context.to_prompt_context(max_tokens=REPO_CONTEXT_TOKEN_BUDGET) if repo_context else None,
             project_type=repo_context.project_type if repo_context else None,
             framework=repo_context.detected_framework if repo_context else None,
         )
@@ -0,0 +1,156 @@
+"""Tests for HistoryCompressor (no network access)."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from auto_deployer.llm.history_compressor import HistoryCompressor
+
+
+@pytest.fixture
+def always_use_llm(monkeypatch):
+    # The short histories below would otherwise be summarized without the LLM
+    monkeypatch.setattr(HistoryCompressor, "_is_trivial", staticmethod(lambda commands: False))
+
+
+def _command(command, success=True):
+    return SimpleNamespace(command=command, success=success, exit_code=0 if success else 1,
+                           stdout="out", stderr="")
+
+
+class FakeProvider:
+    def __init__(self, batch_response):
+        self.batch_response = batch_response
+        self.calls = []
+
+    def generate_response(self, prompt, system_prompt=None, response_format="json", **kwargs):
+        self.calls.append(response_format)
+        if response_format == "json":
+            return self.batch_response
+        return "single:" + prompt.split("\n", 1)[0]
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_compress_batch_dispatches_summaries_by_id():
+    provider = FakeProvider(json.dumps({"summaries": [
+        {"id": 2, "text": "built"}, {"id": 0, "text": "cloned"},
+    ]}))
+    compressor = HistoryCompressor(provider)
+
+    results = compressor.compress_batch([
+        ("clone", "get code", [_command("git clone x")]),
+        ("empty", "nothing", []),
+        ("build", "compile", [_command("make")]),
+    ])
+
+    assert results == ["cloned", "(no commands to compress)", "built"]
+    assert provider.calls == ["json"]
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_compress_batch_falls_back_per_step_on_malformed_response():
+    provider = FakeProvider('{"summaries": [{"id": 0, "text": "cloned"}')
+    compressor = HistoryCompressor(provider)
+
+    results = compressor.compress_batch([
+        ("clone", "get code", [_command("git clone x")]),
+        ("build", "compile", [_command("make", success=False)]),
+    ])
+
+    assert results == ["single:Step: clone", "single:Step: build"]
+    assert provider.calls == ["json", "text", "text"]
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_compress_reuses_summary_of_similar_commands():
+    from auto_deployer.llm.cache import SemanticCache
+
+    def embed(text):
+        vocab = ["pip", "install", "which", "python3", "npm"]
+        words = text.split()
+        return [float(words.count(w)) for w in vocab]
+
+    provider = FakeProvider(None)
+    compressor = HistoryCompressor(provider, semantic_cache=SemanticCache(threshold=0.95, embed_fn=embed))
+
+    first = compressor.compress([_command("which python3"), _command("pip install -r a.txt")], "deps", "g")
+    second = compressor.compress([_command("which python3"), _command("pip install -r b.txt")], "deps", "g")
+    other_goal = compressor.compress([_command("which python3"), _command("pip install -r a.txt")], "env", "h")
+
+    assert first == second == "single:Step: deps"
+    assert other_goal == "single:Step: env"
+    assert provider.calls == ["text", "text"]
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_compress_does_not_share_summaries_of_failures():
+    from auto_deployer.llm.cache import SemanticCache
+
+    class EchoProvider:
+        def generate_response(self, prompt, **kwargs):
+            return "port in use" if "EADDRINUSE" in prompt else "module missing"
+
+    compressor = HistoryCompressor(
+        EchoProvider(), semantic_cache=SemanticCache(threshold=0.5, embed_fn=lambda text: [1.0])
+    )
+    port = SimpleNamespace(command="npm run build", success=False, exit_code=1,
+                           stdout="", stderr="Error: listen EADDRINUSE :::3000")
+    module = SimpleNamespace(command="npm run build", success=False, exit_code=1,
+                             stdout="", stderr="Error: Cannot find module 'vite'")
+
+    assert compressor.compress([port], "build", "g") == "port in use"
+    assert compressor.compress([module], "build", "g") == "module missing"
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_compress_stream_yields_chunks_and_falls_back_when_empty():
+    class StreamingProvider:
+        def __init__(self, chunks):
+            self.chunks = chunks
+
+        def stream_response(self, prompt, system_prompt=None, response_format="json", timeout=60):
+            yield from self.chunks
+
+    commands = [_command("git clone x")]
+    streamed = HistoryCompressor(StreamingProvider(["\n", " Cloned", " repo\n"]))
+    assert list(streamed.compress_stream(commands, "clone", "g")) == ["Cloned", " repo\n"]
+
+    empty = HistoryCompressor(StreamingProvider([]))
+    (fallback,) = empty.compress_stream(commands, "clone", "g")
+    assert fallback == empty._fallback_compression(commands)
+
+
+def test_distill_output_drops_terminal_noise():
+    from auto_deployer.llm.history_compressor import _distill_output
+
+    progress = "Downloading 10%\rDownloading 60%\rDownloading 100%\n"
+    text = "\x1b[32mCollecting flask\x1b[0m\n" + progress + "ok\nok\nok\n\nDone\n"
+    assert _distill_output(text) == "Collecting flask\nDownloading 100%\nok\nDone"
+
+    long_output = "\n".join(f"line {i}" for i in range(30))
+    assert _distill_output(long_output, keep_lines=2) == "line 0\nline 1\n... (26 lines omitted)\nline 28\nline 29"
+
+
+def test_trivial_histories_skip_the_llm():
+    provider = FakeProvider(None)
+    compressor = HistoryCompressor(provider)
+    failed = SimpleNamespace(command="make", success=False, exit_code=2, stdout="", stderr="x" * 600)
+
+    assert compressor.compress([_command("ls")], "s", "g").startswith("=== Compressed History (Fallback)")
+    assert compressor.compress([_command("ls")] * 5, "s", "g").startswith("=== Compressed History (Fallback)")
+    assert provider.calls == []
+
+    assert compressor.compress([failed], "s", "g") == "single:Step: s"
+    assert provider.calls == ["text"]
+
+
+@pytest.mark.usefixtures("always_use_llm")
+def test_large_histories_are_compressed_in_chunks_and_merged():
+    provider = FakeProvider(None)
+    compressor = HistoryCompressor(provider)
+
+    result = compressor.compress([_command(f"pip install pkg{i}") for i in range(90)], "deps", "g")
+
+    assert provider.calls == ["text"] * 4  # Three chunks of <= 40 commands plus the merge
+    assert result == "single:Step: deps"
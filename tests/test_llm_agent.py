@@ -0,0 +1,14 @@
+"""Tests for the deployment plan data model (no network access)."""
+
+from auto_deployer.llm.agent import DeploymentPlan
+
+
+def test_deployment_plan_from_dict_builds_typed_steps():
+    plan = DeploymentPlan.from_dict({
+        "strategy": "docker",
+        "steps": [{"id": 1, "name": "Build", "depends_on": []}, {"id": 2, "name": "Run", "depends_on": [1]}],
+    })
+
+    assert [s.name for s in plan.steps] == ["Build", "Run"]
+    assert plan.steps[0].category == "setup"
+    assert plan.to_dict()["steps"][1]["depends_on"] == [1]
@@ -0,0 +1,163 @@
+"""Tests for LLM response caches."""
+
+import pytest
+
+from auto_deployer.llm.cache import SemanticCache, get_exact_cache, normalize_prompt
+
+
+@pytest.fixture(autouse=True)
+def _clear_exact_cache():
+    get_exact_cache().clear()
+    yield
+    get_exact_cache().clear()
+
+
+def _bag_of_words(text):
+    vocab = ["error", "permission", "denied", "port", "in", "use", "<n>", "<path>", "<time>"]
+    words = text.lower().split()
+    return [float(words.count(w)) for w in vocab]
+
+
+def test_normalize_prompt_strips_volatile_fields():
+    a = normalize_prompt("2024-05-01 12:00:01 pid 4242: /var/lib/app/run.sock permission denied")
+    b = normalize_prompt("2024-06-11 08:13:59 pid 17: /tmp/x/run.sock permission denied")
+    assert a == b == "<time> pid <n>: <path> permission denied"
+
+
+def test_semantic_cache_returns_near_duplicates_only():
+    cache = SemanticCache(threshold=0.95, embed_fn=_bag_of_words)
+    cache.put("refine", "error 13 permission denied /srv/app/data", "fix permissions")
+
+    assert cache.get("refine", "error 1 permission denied /home/u/data") == "fix permissions"
+    assert cache.get("refine", "error port 8080 in use") is None
+    assert cache.get("other", "error 13 permission denied /srv/app/data") is None
+
+
+def test_refiner_reuses_cached_analysis():
+    import json
+
+    from auto_deployer.knowledge.refiner import ExperienceRefiner
+
+    analysis = json.dumps({
+        "problem_summary": "p", "solution_summary": "s", "lesson": "l",
+        "scope": "universal", "keywords": ["k"],
+    })
+    prompts = []
+
+    class FakeLLM:
+        def generate(self, prompt):
+            prompts.append(prompt)
+            return analysis
+
+    refiner = ExperienceRefiner(FakeLLM(), cache=SemanticCache(embed_fn=_bag_of_words))
+    first = refiner.refine({"id": "a", "content": "error permission denied pid 12", "metadata": {}})
+    second = refiner.refine({"id": "b", "content": "error permission denied pid 99", "metadata": {}})
+
+    assert first and second and second["id"] == "b"
+    assert len(prompts) == 1
+
+
+def test_disk_cache_expires_entries(tmp_path, monkeypatch):
+    from auto_deployer.llm import cache as cache_module
+    from auto_deployer.llm.cache import DiskCache
+
+    disk_cache = DiskCache(tmp_path, ttl=60)
+    disk_cache.set("ab" * 32, "plan")
+    assert disk_cache.get("ab" * 32) == "plan"
+    assert disk_cache.get("cd" * 32) is None
+
+    now = cache_module.time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+    assert disk_cache.get("ab" * 32) is None
+
+
+def test_generate_response_uses_disk_cache_when_enabled(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from auto_deployer.llm.deepseek import DeepSeekProvider
+
+    monkeypatch.setenv("AUTO_DEPLOYER_LLM_CACHE", "1")
+    monkeypatch.setenv("AUTO_DEPLOYER_LLM_CACHE_DIR", str(tmp_path))
+    config = SimpleNamespace(api_key="k", endpoint=None, model=None, temperature=0.0, proxy=None,
+                             requests_per_minute=None, max_concurrency=None)
+    calls = []
+
+    class Session:
+        def post(self, url, **kwargs):
+            calls.append(url)
+            return SimpleNamespace(status_code=200, content=b'{"choices":[{"message":{"content":"ok"}}]}')
+
+    first, second = DeepSeekProvider(config), DeepSeekProvider(config)
+    first.session = second.session = Session()
+
+    assert first.generate_response("cache me") == "ok"
+    get_exact_cache().clear()  # Simulate a new process
+    assert second.generate_response("cache me") == "ok"
+    assert len(calls) == 1
+
+    monkeypatch.delenv("AUTO_DEPLOYER_LLM_CACHE")
+    get_exact_cache().clear()
+    assert second.generate_response("cache me") == "ok"
+    assert len(calls) == 2
+
+
+def test_exact_match_cache_skips_repeated_and_sampled_requests():
+    from types import SimpleNamespace
+
+    from auto_deployer.llm.deepseek import DeepSeekProvider
+
+    calls = []
+
+    class Session:
+        def post(self, url, **kwargs):
+            calls.append(url)
+            return SimpleNamespace(status_code=200, content=b'{"choices":[{"message":{"content":"ok"}}]}')
+
+    def _provider(temperature):
+        provider = DeepSeekProvider(SimpleNamespace(
+            api_key="k", endpoint=None, model=None, temperature=temperature, proxy=None,
+            requests_per_minute=None, max_concurrency=None))
+        provider.session = Session()
+        return provider
+
+    assert _provider(0.0).generate_response("compress", "sys") == "ok"
+    assert _provider(0.0).generate_response("compress", "sys") == "ok"
+    assert len(calls) == 1
+    assert _provider(0.0).generate_response("compress", "other sys") == "ok"
+    assert len(calls) == 2
+
+    assert _provider(0.7).generate_response("compress", "sys") == "ok"
+    assert _provider(0.7).generate_response("compress", "sys") == "ok"
+    assert len(calls) == 4
+
+
+def test_request_key_includes_endpoint_and_max_tokens():
+    from types import SimpleNamespace
+
+    from auto_deployer.llm.base import request_key
+
+    def _provider(base_url, max_tokens=None):
+        return SimpleNamespace(base_url=base_url, model="llama3", temperature=0.0,
+                               _body_base={"model": "llama3", "max_tokens": max_tokens})
+
+    key = request_key(_provider("http://gpu-a:8000/v1"), "p", "s", "json")
+    assert request_key(_provider("http://gpu-a:8000/v1"), "p", "s", "json") == key
+    assert request_key(_provider("http://gpu-b:8000/v1"), "p", "s", "json") != key
+    assert request_key(_provider("http://gpu-a:8000/v1", 4096), "p", "s", "json") != key
+
+
+def test_exact_match_cache_ttl_and_lru(monkeypatch):
+    from auto_deployer.llm import cache as cache_module
+    from auto_deployer.llm.cache import ExactMatchCache
+
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    exact = ExactMatchCache(ttl=10, max_entries=2)
+    exact.set("a", "A")
+    exact.set("b", "B")
+    assert exact.get("a") == "A"
+    exact.set("c", "C")  # Evicts "b", the least recently used
+    assert exact.get("b") is None
+
+    now[0] += 11
+    assert exact.get("a") is None
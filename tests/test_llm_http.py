@@ -0,0 +1,138 @@
+"""Tests for the shared LLM HTTP session pool."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from auto_deployer.llm import _http
+from auto_deployer.llm._http import get_session
+from auto_deployer.llm.deepseek import DeepSeekProvider
+from auto_deployer.llm.openai import OpenAIProvider
+
+
+@pytest.fixture(autouse=True)
+def _no_warmup(monkeypatch):
+    # No real HEAD requests from tests, even if AUTO_DEPLOYER_HTTP_WARMUP is set
+    monkeypatch.setattr(_http, "WARMUP_ENABLED", False)
+
+
+def _config(**overrides):
+    # tests/test_fix.py replaces auto_deployer.config in sys.modules, so avoid LLMConfig
+    values = dict(api_key="k", endpoint=None, temperature=0.0, proxy="http://127.0.0.1:1",
+                  requests_per_minute=None, max_concurrency=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_session_shared_per_proxy_and_host():
+    a = get_session(None, "https://api.example.com/v1")
+    b = get_session(None, "https://api.example.com/v2")
+    assert a is b
+
+    assert get_session(None, "https://other.example.com/v1") is not a
+    assert get_session("http://127.0.0.1:7890", "https://api.example.com/v1") is not a
+
+
+def test_providers_reuse_session_across_instances():
+    config = _config(provider="openai", model="gpt-4o")
+    first = OpenAIProvider(config)
+    second = OpenAIProvider(config)
+    assert first.session is second.session
+    assert first.session.proxies == {"http": "http://127.0.0.1:1", "https": "http://127.0.0.1:1"}
+
+    other = DeepSeekProvider(_config(provider="deepseek", model="deepseek-chat"))
+    assert other.session is not first.session
+
+
+def test_pooled_sockets_use_keepalive():
+    import socket
+
+    session = get_session(None, "https://keepalive.example.com")
+    adapter = session.get_adapter("https://keepalive.example.com")
+    options = adapter.poolmanager.connection_pool_kw["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in options
+
+
+def test_provider_context_manager_releases_session():
+    with OpenAIProvider(_config(provider="openai", model="gpt-4o")) as provider:
+        assert provider.session is not None
+    assert provider.session is None
+
+
+def test_warmup_is_opt_in(monkeypatch):
+    warmed = []
+    monkeypatch.setattr(_http, "_warmup", lambda session, base_url: warmed.append(base_url))
+
+    get_session(None, "https://cold.example.com/v1")
+    OpenAIProvider(_config(provider="openai", model="gpt-4o", proxy="http://127.0.0.1:2"))
+    assert warmed == []
+
+    get_session(None, "https://warm.example.com/v1", warmup=True)
+    OpenAIProvider(_config(provider="openai", model="gpt-4o", proxy="http://127.0.0.1:3",
+                           warmup_connections=True))
+    for _ in range(50):
+        if len(warmed) == 2:
+            break
+        time.sleep(0.01)
+    assert sorted(warmed) == ["https://api.openai.com/v1", "https://warm.example.com/v1"]
+
+
+def test_close_sessions_empties_pool():
+    session = get_session(None, "https://closing.example.com")
+    _http.close_sessions()
+    assert not _http._SESSIONS
+    assert get_session(None, "https://closing.example.com") is not session
+
+
+def test_log_error_response_parses_json_only_when_declared(caplog):
+    import logging
+    from types import SimpleNamespace as Response
+
+    from auto_deployer.llm._http import log_error_response
+
+    def _boom():
+        raise AssertionError("should not parse non-JSON bodies")
+
+    with caplog.at_level(logging.ERROR):
+        log_error_response(Response(headers={"Content-Type": "text/html"}, text="<h1>Bad Gateway</h1>", json=_boom))
+        log_error_response(Response(headers={"Content-Type": "application/json"}, text="",
+                                    json=lambda: {"error": "quota"}))
+        log_error_response(None)
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "Response text: <h1>Bad Gateway</h1>",
+        "Error details: {'error': 'quota'}",
+    ]
+
+
+def test_planner_reuses_provider_session():
+    from auto_deployer.llm.agent import DeploymentPlanner
+
+    planner = DeploymentPlanner(_config(provider="openai", model="gpt-4o"))
+    assert planner.session is planner.llm_provider.session
+    assert planner.session is get_session("http://127.0.0.1:1", "https://api.openai.com/v1")
+
+
+def test_encode_body_gzips_only_large_bodies_when_enabled():
+    import gzip
+
+    from auto_deployer.llm._http import GZIP_MIN_BYTES, encode_body, loads
+
+    small = {"prompt": "hi"}
+    large = {"prompt": "x" * (GZIP_MIN_BYTES + 1)}
+
+    assert encode_body(small, compress=True)[1] == {}
+    assert encode_body(large)[1] == {}
+    data, headers = encode_body(large, compress=True)
+    assert headers == {"Content-Encoding": "gzip"}
+    assert loads(gzip.decompress(data)) == large
+
+
+def test_sessions_retry_connect_errors_only():
+    from auto_deployer.llm._http import _build_session
+
+    retry = _build_session(None).get_adapter("https://api.example.com").max_retries
+    assert retry.connect == 2
+    assert retry.read == 0 and retry.status == 0
@@ -0,0 +1,406 @@
+"""Tests for LLM provider request handling (no network access)."""
+
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from auto_deployer.llm.anthropic import AnthropicProvider
+from auto_deployer.llm.cache import get_exact_cache
+from auto_deployer.llm.deepseek import DeepSeekProvider
+
+
+@pytest.fixture(autouse=True)
+def _no_warmup(monkeypatch):
+    # Providers must not open real connections from unit tests
+    from auto_deployer.llm import _http
+
+    monkeypatch.setattr(_http, "WARMUP_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    # Providers share a process-wide response cache and per-provider circuit
+    # breakers, which failures recorded by earlier tests could have opened
+    from auto_deployer.llm import circuit_breaker
+
+    get_exact_cache().clear()
+    with circuit_breaker._BREAKERS_LOCK:
+        circuit_breaker._BREAKERS.clear()
+
+
+def _config(**overrides):
+    # tests/test_fix.py replaces auto_deployer.config in sys.modules, so avoid LLMConfig
+    values = dict(api_key="k", endpoint=None, model=None, temperature=0.0, proxy=None,
+                  requests_per_minute=None, max_concurrency=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class FakeResponse:
+    def __init__(self, payload=None, status_code=200, text=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = text if text is not None else json.dumps(payload)
+        self.content = self.text.encode("utf-8")
+        self.headers = {"Content-Type": "application/json"}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+class FakeSession:
+    """Records requests and replays queued responses per (method, url)."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def _respond(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        queue = self.routes[(method, url)]
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def post(self, url, **kwargs):
+        return self._respond("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self._respond("GET", url, **kwargs)
+
+
+def test_anthropic_batch_generate_aligns_results_by_custom_id():
+    provider = AnthropicProvider(_config())
+    base = provider.base_url
+    results_jsonl = "\n".join([
+        json.dumps({"custom_id": "req-1", "result": {
+            "type": "succeeded", "message": {"content": [{"type": "text", "text": "second"}]}}}),
+        json.dumps({"custom_id": "req-0", "result": {
+            "type": "succeeded", "message": {"content": [{"type": "text", "text": "first"}]}}}),
+        json.dumps({"custom_id": "req-2", "result": {"type": "errored", "error": {"type": "x"}}}),
+    ])
+    provider.session = FakeSession({
+        ("POST", f"{base}/messages/batches"): [FakeResponse({"id": "b1"})],
+        ("GET", f"{base}/messages/batches/b1"): [
+            FakeResponse({"processing_status": "ended", "results_url": "https://results/b1"})
+        ],
+        ("GET", "https://results/b1"): [FakeResponse(text=results_jsonl)],
+    })
+
+    results = provider.batch_generate([("a", None), ("b", "sys"), ("c", None)])
+
+    assert results == ["first", "second", None]
+    submitted = json.loads(provider.session.calls[0][2]["data"])["requests"]
+    assert [r["custom_id"] for r in submitted] == ["req-0", "req-1", "req-2"]
+    assert submitted[1]["params"]["system"].startswith("sys")
+
+
+def test_default_batch_generate_fans_out_generate_response():
+    provider = DeepSeekProvider(_config())
+    provider.generate_response = lambda prompt, system_prompt=None, **kwargs: prompt.upper()
+
+    assert provider.batch_generate([("a", None), ("b", None)]) == ["A", "B"]
+    assert provider.batch_generate([]) == []
+
+
+def test_rate_limiter_spaces_requests_beyond_bucket():
+    from auto_deployer.llm.rate_limiter import LLMRateLimiter
+
+    limiter = LLMRateLimiter(requests_per_minute=60, max_concurrency=2)
+    limiter._tokens = 0  # Drain the initial burst
+    start = time.monotonic()
+    with limiter:
+        pass
+    assert time.monotonic() - start >= 0.9
+
+
+def test_rate_limiters_are_shared_per_provider_settings():
+    from auto_deployer.llm.rate_limiter import get_rate_limiter
+
+    assert get_rate_limiter("anthropic") is get_rate_limiter("anthropic")
+    assert get_rate_limiter("anthropic").requests_per_minute == 50
+    assert get_rate_limiter("anthropic", 100) is not get_rate_limiter("anthropic")
+    assert get_rate_limiter("deepseek").requests_per_minute is None
+
+
+class FakeStreamResponse(FakeResponse):
+    def __init__(self, lines):
+        super().__init__(text="")
+        self._lines = lines
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_openai_style_stream_response_yields_deltas():
+    provider = DeepSeekProvider(_config())
+    chunks = [{"choices": [{"delta": {"content": text}}]} for text in ("Hel", "lo ", "世界")]
+    lines = [b"data: " + json.dumps(c).encode() for c in chunks]
+    lines.insert(1, b"")
+    lines.append(b"data: [DONE]")
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [FakeStreamResponse(lines)],
+    })
+
+    assert "".join(provider.stream_response("hi")) == "Hello 世界"
+    sent = provider.session.calls[0][2]
+    assert sent["stream"] is True
+    assert json.loads(sent["data"])["stream"] is True
+
+
+def test_anthropic_stream_response_reads_content_block_deltas():
+    provider = AnthropicProvider(_config())
+    events = [
+        {"type": "message_start", "message": {}},
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "{\"a\":"}},
+        {"type": "content_block_delta", "delta": {"type": "text_delta", "text": " 1}"}},
+        {"type": "message_stop"},
+    ]
+    lines = [b"event: x\ndata: " + json.dumps(e).encode() for e in events]
+    lines = [part for line in lines for part in line.split(b"\n")]
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/messages"): [FakeStreamResponse(lines)],
+    })
+
+    assert "".join(provider.stream_response("hi")) == '{"a": 1}'
+
+
+def test_circuit_breaker_opens_and_recovers(monkeypatch):
+    from auto_deployer.llm import circuit_breaker
+    from auto_deployer.llm.circuit_breaker import CircuitBreaker
+
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=3, failure_window=60, recovery_timeout=30)
+
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert not breaker.allow_request()
+
+    now[0] += 30
+    assert breaker.allow_request()  # Trial request
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+
+
+def test_half_open_trial_without_outcome_does_not_wedge_circuit(monkeypatch):
+    from auto_deployer.llm import circuit_breaker
+    from auto_deployer.llm.circuit_breaker import CircuitBreaker
+
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    provider = DeepSeekProvider(_config())
+    provider._breaker = CircuitBreaker("deepseek", failure_threshold=1, recovery_timeout=30, trial_timeout=120)
+    provider._breaker.record_failure()
+
+    # max_retries=0 sends nothing, so the trial is handed back
+    now[0] += 30
+    assert provider.generate_response("hi", max_retries=0) is None
+    assert provider._breaker.allow_request()
+
+    # A trial that never reports back expires
+    assert not provider._breaker.allow_request()
+    now[0] += 120
+    assert provider._breaker.allow_request()
+
+
+def test_circuit_breakers_are_per_endpoint_host():
+    from auto_deployer.llm.circuit_breaker import get_circuit_breaker
+
+    local = get_circuit_breaker("openai-compatible", "http://localhost:11434/v1")
+    assert get_circuit_breaker("openai-compatible", "http://localhost:11434/v2") is local
+    assert get_circuit_breaker("openai-compatible", "http://localhost:1234/v1") is not local
+
+
+def test_open_circuit_skips_http_call():
+    from auto_deployer.llm.circuit_breaker import CircuitBreaker
+
+    provider = DeepSeekProvider(_config())
+    provider._breaker = CircuitBreaker("deepseek", failure_threshold=1)
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [FakeResponse({"error": "down"}, status_code=503)],
+    })
+
+    assert provider.generate_response("hi") is None
+    assert provider.generate_response("hi") is None
+    assert len(provider.session.calls) == 1
+
+
+def test_stream_failures_feed_circuit_breaker():
+    from auto_deployer.llm.circuit_breaker import CircuitBreaker
+
+    provider = DeepSeekProvider(_config())
+    provider._breaker = CircuitBreaker("deepseek", failure_threshold=1)
+    failed = FakeStreamResponse([])
+    failed.status_code = 503
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [failed],
+    })
+
+    assert list(provider.stream_response("hi")) == []
+    assert list(provider.stream_response("hi")) == []
+    assert len(provider.session.calls) == 1
+
+
+def test_rate_limited_stream_cools_down_key():
+    provider = DeepSeekProvider(_config())
+    limited = FakeStreamResponse([])
+    limited.status_code = 429
+    limited.headers = {"Retry-After": "30"}
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [limited],
+    })
+
+    assert list(provider.stream_response("hi")) == []
+    (slot,) = provider._key_pool._slots
+    assert slot.cooling_until - time.monotonic() > 20
+    assert len(provider._breaker._failures) == 1
+
+
+def test_identical_concurrent_requests_are_coalesced():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    provider = DeepSeekProvider(_config())
+    release = threading.Event()
+
+    class SlowSession(FakeSession):
+        def post(self, url, **kwargs):
+            release.wait(5)
+            return super().post(url, **kwargs)
+
+    provider.session = SlowSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [
+            FakeResponse({"choices": [{"message": {"content": "plan"}}]})
+        ],
+    })
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(provider.generate_response, "same prompt") for _ in range(3)]
+        time.sleep(0.2)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["plan", "plan", "plan"]
+    assert len(provider.session.calls) == 1
+
+
+def test_concurrent_requests_sampling_above_cache_temperature_are_not_coalesced():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    provider = DeepSeekProvider(_config(temperature=0.7))
+    started = threading.Barrier(2, timeout=5)
+
+    class SlowSession(FakeSession):
+        def post(self, url, **kwargs):
+            started.wait()  # Both calls are in flight at the same time
+            return super().post(url, **kwargs)
+
+    provider.session = SlowSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [
+            FakeResponse({"choices": [{"message": {"content": "plan"}}]})
+        ],
+    })
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(provider.generate_response, "same prompt") for _ in range(2)]
+        results = [f.result() for f in futures]
+
+    assert results == ["plan", "plan"]
+    assert len(provider.session.calls) == 2
+
+
+def test_abatch_generate_overlaps_calls():
+    import asyncio
+
+    provider = DeepSeekProvider(_config())
+
+    def slow_generate(prompt, system_prompt=None, response_format="json", timeout=60, max_retries=3):
+        time.sleep(0.3)
+        return f"{prompt}:{system_prompt}"
+
+    provider.generate_response = slow_generate
+    start = time.monotonic()
+    results = asyncio.run(provider.abatch_generate([("a", None), ("b", "s"), ("c", None)]))
+
+    assert results == ["a:None", "b:s", "c:None"]
+    assert time.monotonic() - start < 0.8
+
+
+def test_long_system_prompts_are_marked_for_prompt_caching():
+    from auto_deployer.llm.history_compressor import COMPRESSION_SYSTEM_PROMPT
+    from auto_deployer.llm.openrouter import OpenRouterProvider
+
+    anthropic_body = AnthropicProvider(_config())._build_body("p", COMPRESSION_SYSTEM_PROMPT, "text")
+    assert anthropic_body["system"] == [
+        {"type": "text", "text": COMPRESSION_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+    assert AnthropicProvider(_config())._build_body("p", "short", "text")["system"] == "short"
+
+    claude = OpenRouterProvider(_config(model="anthropic/claude-3.5-sonnet"))
+    gpt = OpenRouterProvider(_config(model="openai/gpt-4o"))
+    assert claude._build_body("p", COMPRESSION_SYSTEM_PROMPT, "text")["messages"][0]["content"][0]["cache_control"]
+    assert gpt._build_body("p", COMPRESSION_SYSTEM_PROMPT, "text")["messages"][0]["content"] == COMPRESSION_SYSTEM_PROMPT
+
+
+def test_retry_delay_honors_retry_after_and_caps_backoff():
+    from auto_deployer.llm.rate_limiter import RETRY_BACKOFF_CAP, retry_delay
+
+    assert retry_delay(SimpleNamespace(headers={"Retry-After": "2"}), 3) == 2.0
+    assert retry_delay(SimpleNamespace(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}), 0) == 0.0
+    assert 1.0 <= retry_delay(SimpleNamespace(headers={}), 0) < 2.0
+    assert retry_delay(SimpleNamespace(headers={}), 10) == RETRY_BACKOFF_CAP
+
+
+def test_rate_limited_request_waits_retry_after(monkeypatch):
+    from auto_deployer.llm import _chat
+
+    sleeps = []
+    monkeypatch.setattr(_chat.time, "sleep", sleeps.append)
+    throttled = FakeResponse({"error": "slow down"}, status_code=429)
+    throttled.headers = {"Retry-After": "2"}
+    provider = DeepSeekProvider(_config())
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [
+            throttled, FakeResponse({"choices": [{"message": {"content": "ok"}}]}),
+        ],
+    })
+
+    assert provider.generate_response("hi") == "ok"
+    assert sleeps == [2.0]
+
+
+def test_rate_limited_key_is_skipped_for_other_api_keys(monkeypatch):
+    from auto_deployer.llm import _chat
+
+    sleeps = []
+    monkeypatch.setattr(_chat.time, "sleep", sleeps.append)
+    throttled = FakeResponse({"error": "slow down"}, status_code=429)
+    throttled.headers = {"Retry-After": "20"}
+    ok = FakeResponse({"choices": [{"message": {"content": "ok"}}]})
+    provider = DeepSeekProvider(_config(api_keys=["k2"]))
+    provider.session = FakeSession({
+        ("POST", f"{provider.base_url}/chat/completions"): [throttled, ok],
+    })
+
+    assert provider.generate_response("first") == "ok"
+    assert provider.generate_response("second") == "ok"
+
+    used = [call[2]["headers"]["Authorization"] for call in provider.session.calls]
+    assert used == ["Bearer k", "Bearer k2", "Bearer k2"]  # "k" is cooling down
+    assert sleeps == []
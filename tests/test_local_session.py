@@ -0,0 +1,92 @@
+"""Tests for local command execution (runs real /bin/bash commands)."""
+
+import io
+import sys
+
+import pytest
+
+from auto_deployer.local.session import LocalSession, _Echo
+
+unix_only = pytest.mark.skipif(sys.platform == "win32", reason="streams through /bin/bash")
+
+
+@pytest.fixture
+def session(tmp_path):
+    return LocalSession(str(tmp_path))
+
+
+@unix_only
+def test_streaming_returns_output_and_exit_status(session, capfd):
+    result = session.run("echo out; echo err >&2; exit 3", timeout=10, idle_timeout=5)
+
+    assert (result.stdout, result.stderr, result.exit_status) == ("out", "err", 3)
+    # Output is also echoed live
+    captured = capfd.readouterr()
+    assert "out" in captured.out
+    assert "err" in captured.err
+
+
+@unix_only
+def test_streaming_normalizes_carriage_returns(session):
+    result = session.run(r'printf "a\r\nb\rc\n"', timeout=10, idle_timeout=5)
+
+    assert result.stdout == "a\nb\nc"
+    assert result.ok
+
+
+@unix_only
+def test_streaming_collects_large_output(session):
+    result = session.run("head -c 3000000 /dev/zero | tr '\\0' y", timeout=20, idle_timeout=10)
+
+    assert result.stdout == "y" * 3_000_000
+
+
+@unix_only
+def test_streaming_reads_output_written_after_shell_exits(session):
+    result = session.run("(sleep 0.3; echo late) & echo early", timeout=10, idle_timeout=5)
+
+    assert result.stdout == "early\nlate"
+
+
+@unix_only
+def test_streaming_idle_timeout(session):
+    result = session.run("echo start; sleep 5", timeout=10, idle_timeout=1)
+
+    assert result.exit_status == -1
+    assert result.stdout == "start"
+    assert result.stderr.startswith("IDLE_TIMEOUT")
+
+
+@unix_only
+def test_streaming_total_timeout_with_continuous_output(session):
+    result = session.run("while true; do echo x; sleep 0.1; done", timeout=1, idle_timeout=5)
+
+    assert result.exit_status == -2
+    assert result.stderr.startswith("TOTAL_TIMEOUT")
+    assert result.stdout.startswith("x")
+
+
+def test_echo_decodes_when_child_encoding_differs():
+    raw = io.BytesIO()
+    terminal = io.TextIOWrapper(raw, encoding="utf-8")
+    echo = _Echo(terminal, encoding="gbk")
+
+    data = "中文输出\n".encode("gbk")
+    # A multi-byte character split across reads must not turn into mojibake
+    echo.write(data[:3])
+    echo.write(data[3:])
+    echo.close()
+
+    assert raw.getvalue().decode("utf-8") == "中文输出\n"
+
+
+def test_echo_passes_bytes_through_when_encodings_match():
+    raw = io.BytesIO()
+    terminal = io.TextIOWrapper(raw, encoding="UTF-8")
+    echo = _Echo(terminal, encoding="utf8")
+
+    echo.write(b"\xe4\xb8\xad")
+    echo.close()
+
+    assert echo._decoder is None
+    assert raw.getvalue() == b"\xe4\xb8\xad"
@@ -200,6 +200,106 @@ def test_format_for_llm():
     print("\n✅ LLM格式化测试通过!")
 
 
+def test_identify_error_type():
+    """测试错误类型识别（按优先级，而非出现位置）"""
+    extractor = CommandOutputExtractor()
+
+    cases = {
+        "Connection refused\nPermission denied": "Permission Error",
+        "ERROR: module NOT FOUND": "Not Found Error",
+        "disk quota exceeded\nno space left": "Disk Space Error",
+        "port 8080\nbind: address already in use": "Port Conflict Error",
+        "Killed (OOM)": "Memory Error",
+        "exit status 1": "Unknown Error",
+    }
+    for text, expected in cases.items():
+        assert extractor._identify_error_type(text) == expected, text
+
+
+def test_key_info_keeps_first_unique_matches():
+    """测试关键信息按出现顺序去重并限制数量"""
+    extractor = CommandOutputExtractor()
+    stdout = "\n".join(f"listening on port {p}" for p in (3000, 3000, 8080, 9000, 9001))
+
+    assert extractor._find_key_info(stdout, 3) == ["port: 3000", "port: 8080", "port: 9000"]
+
+
+def test_key_info_single_pass_does_not_split_urls():
+    """测试关键信息单次扫描：URL 内部的 IP/路径不再重复提取"""
+    extractor = CommandOutputExtractor()
+
+    key_info = extractor._find_key_info("Listening at http://0.0.0.0:8000/api", 3)
+
+    assert key_info == ["url: http://0.0.0.0:8000/api"]
+
+
+def test_huge_output_scans_head_and_tail_only():
+    """测试超大输出只扫描头尾窗口，但保留原始长度"""
+    extractor = CommandOutputExtractor()
+    stdout = "Collecting package\n" * 50000 + "ERROR: No matching distribution found"
+
+    result = extractor.extract(stdout, "", False, 1, command="pip install foo")
+
+    assert result.full_length == len(stdout)
+    assert "No matching distribution found" in result.error_context
+    assert "chars truncated" not in result.summary
+
+
+def test_bytes_output_is_decoded_after_windowing():
+    """测试直接传入 bytes 输出"""
+    extractor = CommandOutputExtractor()
+    stdout = "构建中...\n".encode("utf-8") * 30000 + b"Error: build failed"
+
+    result = extractor.extract(stdout, b"", False, 2, command="npm run build")
+
+    assert "Error: build failed" in result.error_context
+    # 截去部分按字符计，与同样内容的 str 输入一致
+    text_result = extractor.extract(stdout.decode("utf-8"), "", False, 2, command="npm run build")
+    assert result.full_length == text_result.full_length
+    assert extractor.extract(b"done", b"", True, 0).key_info == ["done"]
+
+
+def test_directory_listing_formats():
+    """测试目录列表格式识别（PowerShell / ls -l / 简单 ls）"""
+    extractor = CommandOutputExtractor()
+
+    ls_long = (
+        "total 8\n"
+        "drwxr-xr-x 2 user group 4096 Dec 12 23:52 src\n"
+        "-rw-r--r-- 1 user group  120 Dec 12 23:52 app.py"
+    )
+    assert extractor.extract(ls_long, "", True, 0, command="ls -l").key_info == ["[DIR] src", "[FILE] app.py"]
+
+    powershell = (
+        "\n    Directory: C:\\proj\n\n"
+        "Mode                 LastWriteTime         Length Name\n"
+        "----                 -------------         ------ ----\n"
+        "d-----        2025/12/12     23:52                node_modules\n"
+        "-a----        2025/12/12     23:52           1234 package.json"
+    )
+    assert extractor.extract(powershell, "", True, 0, command="Get-ChildItem").key_info == [
+        "path: C:\\proj", "[DIR] node_modules", "[FILE] package.json"
+    ]
+
+    assert extractor.extract("app.py  src\nREADME.md", "", True, 0, command="ls").key_info == [
+        "[ITEM] app.py", "[ITEM] src", "[ITEM] README.md"
+    ]
+
+
+def test_small_success_output_is_kept_verbatim():
+    """测试短小的成功输出直接原样保留"""
+    extractor = CommandOutputExtractor()
+
+    result = extractor.extract("/home/user/app\n", "", True, 0, command="npm install")
+    assert result.key_info == ["/home/user/app"]
+    assert result.summary == "✓ npm install (Full output: 1 lines)"
+    assert result.extracted_length == result.full_length
+
+    # 失败输出仍然走错误提取
+    result = extractor.extract("", "error: not found", False, 1, command="npm install")
+    assert result.error_context is not None
+
+
 if __name__ == "__main__":
     print("开始测试智能输出提取器...\n")
 
@@ -207,6 +307,13 @@ if __name__ == "__main__":
         test_command_classification()
         test_output_extraction()
         test_format_for_llm()
+        test_identify_error_type()
+        test_key_info_keeps_first_unique_matches()
+        test_key_info_single_pass_does_not_split_urls()
+        test_huge_output_scans_head_and_tail_only()
+        test_bytes_output_is_decoded_after_windowing()
+        test_directory_listing_formats()
+        test_small_success_output_is_kept_verbatim()
 
         print("\n" + "=" * 50)
         print("🎉 所有测试通过!")
@@ -0,0 +1,44 @@
+"""Tests for RepoContext prompt rendering."""
+
+from auto_deployer.analyzer.repo_analyzer import RepoContext
+from auto_deployer.llm.token_manager import estimate_tokens
+
+
+def _context():
+    return RepoContext(
+        repo_url="https://github.com/example/app.git",
+        project_name="app",
+        project_type="nodejs",
+        directory_tree="\n".join(f"├── file{i}.js" for i in range(400)),
+        files={
+            "README.md": "readme " * 400,
+            "package.json": '{"name": "app"}',
+            "Dockerfile": "FROM node\n" * 300,
+        },
+    )
+
+
+def test_prompt_context_unchanged_within_budget():
+    context = _context()
+    assert context.to_prompt_context(max_tokens=100_000) == context.to_prompt_context()
+
+
+def test_prompt_context_drops_least_important_files_first():
+    context = _context()
+    full = context.to_prompt_context()
+    budget = estimate_tokens(full) - 500
+
+    text = context.to_prompt_context(max_tokens=budget)
+
+    assert estimate_tokens(text) <= budget
+    assert "### README.md" in text and "### package.json" in text
+    assert "### Dockerfile" not in text
+    assert "Omitted to fit the prompt budget: Dockerfile" in text
+
+
+def test_prompt_context_truncates_tree_as_last_resort():
+    text = _context().to_prompt_context(max_tokens=300)
+
+    assert estimate_tokens(text) <= 300
+    assert "... (truncated)" in text
+    assert "README.md, package.json, Dockerfile" in text